@@ -2,6 +2,8 @@ from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from controllers.extensions import db, init_cache
+from controllers.serialization import FastJSONProvider
+from controllers.compression import init_compression
 from dotenv import load_dotenv
 import os
 import logging
@@ -13,11 +15,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+
+# orjson for JSON, with MessagePack for clients that Accept it
+app.json = FastJSONProvider(app)
+
 CORS(app, resources={
 r"/api/*": {
     "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
-    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    "allow_headers": ["Content-Type", "Authorization"]
+    "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    "allow_headers": ["Content-Type", "Authorization"],
+    "expose_headers": ["X-Next-Cursor", "X-Total-Count", "Link"]
 }
 })
 
@@ -28,16 +35,29 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = os.getenv('SQLALCHEMY_TRACK_MODIF
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
 
-app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'redis')
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'layered')
 app.config['REDIS_HOST'] = os.getenv('REDIS_HOST', 'localhost')
 app.config['REDIS_PORT'] = int(os.getenv('REDIS_PORT', 6379))
 app.config['REDIS_DB'] = int(os.getenv('REDIS_DB', 0))
 app.config['CACHE_REDIS_DB'] = int(os.getenv('CACHE_REDIS_DB', 0))
 app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv('CACHE_TIMEOUT', 300))
 
+# In-process tier of the layered cache: entry count and seconds an entry may live
+app.config['CACHE_LOCAL_SIZE'] = int(os.getenv('CACHE_LOCAL_SIZE', 1024))
+app.config['CACHE_LOCAL_TTL'] = int(os.getenv('CACHE_LOCAL_TTL', 30))
+
+# Grade submits in the Celery 'grading' queue instead of the web worker
+app.config['ASYNC_SUBMIT'] = os.getenv('ASYNC_SUBMIT', 'false').lower() == 'true'
+
+# Response compression: bodies below the minimum size are sent as is
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+app.config['COMPRESS_BR_LEVEL'] = int(os.getenv('COMPRESS_BR_LEVEL', 4))
+
 # Initialize extensions
 db.init_app(app)
 cache = init_cache(app)
+init_compression(app)
 jwt = JWTManager(app)
 
 # Initialize Celery
@@ -47,7 +67,9 @@ init_celery(app)
 # Database setup
 with app.app_context():
     from controllers.models import Admin
+    from controllers.schema import upgrade_schema
     db.create_all()
+    upgrade_schema()
     admin_role = Admin.query.filter_by(username='admin').first()
     if not admin_role:
         admin_role = Admin(username='admin', email='admin@gmail.com')
@@ -55,6 +77,13 @@ with app.app_context():
         db.session.add(admin_role)
     db.session.commit()
 
+@app.cli.command('repair-counters')
+def repair_counters_command():
+    """Recompute denormalized chapter, quiz and question counts"""
+    from controllers.schema import repair_counters
+    repair_counters()
+    print("Counters repaired")
+
 # Importing blueprints
 from routes.auth import auth_bp
 from routes.admin import admin_bp
@@ -63,6 +92,7 @@ from routes.quiz import quiz_bp
 from routes.quiz_attempts import attempts_bp
 from routes.users import users_bp
 from routes.exports import exports_bp
+from routes.batch import batch_bp
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -73,6 +103,7 @@ app.register_blueprint(quiz_bp, url_prefix='/api', name='quiz_api_root')
 app.register_blueprint(attempts_bp, url_prefix='/api/attempts')
 app.register_blueprint(users_bp, url_prefix='/api/users')
 app.register_blueprint(exports_bp, url_prefix='/api/exports')  # New export routes
+app.register_blueprint(batch_bp, url_prefix='/api')
 
 @app.route('/api/test-cache')
 def test_cache():
@@ -0,0 +1,78 @@
+"""
+Compare per-answer ORM grading with the set-based grading engine
+
+Usage: python benchmarks/bench_grading.py
+"""
+from common import make_app, seed_quiz, QueryCounter, timed
+from controllers.extensions import db
+from controllers.models import Quiz, Question, QuizAttempt, QuizResponse
+from utils.grading import grade_attempt
+
+SIZES = [10, 100, 500]
+
+
+def legacy_grade(attempt, quiz, answers):
+    """The per-answer loop submit_attempt used before the grading engine"""
+    total_score = 0
+    for answer in answers:
+        question = Question.query.get(answer['question_id'])
+        if not question or question.quiz_id != quiz.id:
+            continue
+        is_correct = answer['selected_option'] == question.correct_option
+        score = question.marks if is_correct else 0
+        total_score += score
+
+        response = QuizResponse.query.filter_by(
+            attempt_id=attempt.id,
+            question_id=question.id
+        ).first()
+        if not response:
+            response = QuizResponse(attempt_id=attempt.id, question_id=question.id)
+            db.session.add(response)
+        response.selected_option = answer['selected_option']
+        response.is_correct = is_correct
+        response.score = score
+
+    attempt.score = total_score
+    attempt.status = 'completed'
+
+
+def run(size):
+    app = make_app()
+    with app.app_context():
+        quiz = seed_quiz(size)
+        question_ids = [q.id for q in Question.query.filter_by(quiz_id=quiz.id)]
+        answers = [{'question_id': qid, 'selected_option': (qid % 4) + 1} for qid in question_ids]
+
+        def new_attempt():
+            attempt = QuizAttempt(user_id=1, quiz_id=quiz.id, status='in_progress', total_marks=size)
+            db.session.add(attempt)
+            db.session.commit()
+            return attempt
+
+        results = {}
+        for name, grade in (
+            ('legacy', lambda a: legacy_grade(a, quiz, answers)),
+            ('engine', lambda a: grade_attempt(a, quiz, answers, 0, total_marks=size)),
+        ):
+            attempt = new_attempt()
+            with QueryCounter(db.engine) as counter:
+                grade(attempt)
+                db.session.commit()
+
+            def once():
+                a = new_attempt()
+                grade(a)
+                db.session.commit()
+
+            results[name] = (counter.count, timed(once))
+
+        db.drop_all()
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'questions':>10} {'legacy sql':>11} {'legacy ms':>10} {'engine sql':>11} {'engine ms':>10}")
+    for size in SIZES:
+        r = run(size)
+        print(f"{size:>10} {r['legacy'][0]:>11} {r['legacy'][1]:>10.1f} {r['engine'][0]:>11} {r['engine'][1]:>10.1f}")
@@ -0,0 +1,103 @@
+"""
+Compare Flask's default JSON encoding with orjson and MessagePack
+
+Payloads mirror get_attempt_results, the admin question list and
+get_all_attempts at realistic sizes.
+
+Usage: python benchmarks/bench_serialization.py
+"""
+import json
+from datetime import datetime, timedelta
+from flask.json.provider import _default as flask_default
+from common import timed
+from controllers.serialization import _default, packb
+import orjson
+
+NOW = datetime(2025, 6, 1, 10, 30)
+
+
+def attempt_results(question_count=200):
+    return {
+        'attempt_id': 1,
+        'quiz_id': 1,
+        'quiz_title': 'Benchmark Quiz',
+        'score': 120,
+        'total_marks': question_count,
+        'score_percentage': 60,
+        'passing_score': 40,
+        'time_taken': 1800,
+        'status': 'completed',
+        'is_passed': True,
+        'created_at': NOW,
+        'submitted_at': NOW + timedelta(minutes=30),
+        'total_questions': question_count,
+        'correct_answers': 120,
+        'incorrect_answers': 60,
+        'unattempted': 20,
+        'responses': [{
+            'id': i,
+            'question_text': f'Question {i}: which option best describes the statement below?',
+            'option_1': 'First option',
+            'option_2': 'Second option',
+            'option_3': 'Third option',
+            'option_4': 'Fourth option',
+            'selected_option': i % 5,
+            'correct_option': (i % 4) + 1,
+            'is_correct': i % 5 == (i % 4) + 1,
+            'score': 1,
+            'marks': 1
+        } for i in range(question_count)]
+    }
+
+
+def question_list(question_count=500):
+    return [{
+        'id': i,
+        'question_text': f'Question {i}: which option best describes the statement below?',
+        'option_1': 'First option',
+        'option_2': 'Second option',
+        'option_3': 'Third option',
+        'option_4': 'Fourth option',
+        'correct_option': (i % 4) + 1,
+        'marks': 1,
+        'created_at': NOW - timedelta(days=i)
+    } for i in range(question_count)]
+
+
+def attempt_history(attempt_count=1000):
+    return [{
+        'id': i,
+        'quiz_id': i % 50,
+        'score': i % 20,
+        'total_marks': 20,
+        'score_percentage': (i % 20) * 5,
+        'time_taken': 600 + i,
+        'created_at': NOW - timedelta(hours=i),
+        'quiz_title': f'Quiz {i % 50}',
+        'chapter_name': f'Chapter {i % 10}',
+        'subject_name': f'Subject {i % 3}'
+    } for i in range(attempt_count)]
+
+
+ENCODERS = {
+    'flask json': lambda obj: json.dumps(obj, default=flask_default, sort_keys=True,
+                                         ensure_ascii=True, separators=(',', ':')).encode(),
+    'orjson': lambda obj: orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS),
+    'msgpack': packb,
+}
+
+PAYLOADS = {
+    'attempt results': attempt_results,
+    'question list': question_list,
+    'attempt history': attempt_history,
+}
+
+
+if __name__ == '__main__':
+    print(f"{'payload':>16} {'encoder':>11} {'ms':>8} {'bytes':>9}")
+    for payload_name, build in PAYLOADS.items():
+        payload = build()
+        for encoder_name, encode in ENCODERS.items():
+            size = len(encode(payload))
+            ms = timed(lambda: [encode(payload) for _ in range(20)]) / 20
+            print(f"{payload_name:>16} {encoder_name:>11} {ms:>8.3f} {size:>9}")
@@ -0,0 +1,64 @@
+"""
+Measure attempt starts per second on SQLite, comparing one ORM
+QuizResponse per question with the single INSERT ... SELECT
+
+Usage: python benchmarks/bench_start_attempt.py
+"""
+import os
+import tempfile
+import time
+from common import make_app, seed_quiz, QueryCounter
+from controllers.extensions import db
+from controllers.models import Question, QuizAttempt, QuizResponse
+from utils.grading import precreate_responses
+
+SIZES = [50, 500]
+STARTS = 200
+
+
+def legacy_start(quiz_id, user_id):
+    attempt = QuizAttempt(user_id=user_id, quiz_id=quiz_id, status='in_progress')
+    db.session.add(attempt)
+    db.session.flush()
+    for question in Question.query.filter_by(quiz_id=quiz_id).all():
+        db.session.add(QuizResponse(attempt_id=attempt.id, question_id=question.id))
+    db.session.commit()
+
+
+def bulk_start(quiz_id, user_id):
+    attempt = QuizAttempt(user_id=user_id, quiz_id=quiz_id, status='in_progress')
+    db.session.add(attempt)
+    db.session.flush()
+    precreate_responses(attempt.id, quiz_id)
+    db.session.commit()
+
+
+def run(size):
+    results = {}
+    for name, start in (('legacy', legacy_start), ('bulk', bulk_start)):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        app = make_app(f'sqlite:///{path}')
+        with app.app_context():
+            quiz = seed_quiz(size, user_count=STARTS)
+
+            with QueryCounter(db.engine) as counter:
+                start(quiz.id, 1)
+
+            started = time.perf_counter()
+            for user_id in range(1, STARTS + 1):
+                start(quiz.id, user_id)
+            elapsed = time.perf_counter() - started
+
+            results[name] = (counter.count, STARTS / elapsed)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(path)
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'questions':>10} {'legacy sql':>11} {'legacy/s':>9} {'bulk sql':>9} {'bulk/s':>9}")
+    for size in SIZES:
+        r = run(size)
+        print(f"{size:>10} {r['legacy'][0]:>11} {r['legacy'][1]:>9.1f} {r['bulk'][0]:>9} {r['bulk'][1]:>9.1f}")
@@ -0,0 +1,107 @@
+"""
+Shared setup for the benchmark scripts
+
+Builds a throwaway Flask app on SQLite and seeds a quiz so the
+benchmarks exercise the real models without touching app.py.
+"""
+import sys
+import time
+from datetime import date, time as dtime
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+from flask import Flask
+from sqlalchemy import event
+from controllers.extensions import db, cache
+from controllers.models import Admin, User, Subject, Chapter, Quiz, Question
+
+
+def make_app(database_uri='sqlite://'):
+    """Create a minimal app with an empty schema"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+    db.init_app(app)
+    # Commits invalidate cache tags, so the cache must be set up too
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+
+    with app.app_context():
+        db.create_all()
+
+    return app
+
+
+def seed_quiz(question_count, user_count=1):
+    """Create an admin, users and one quiz with question_count questions"""
+    admin = Admin(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+
+    subject = Subject(name=f'Subject {question_count}', description='bench', created_by=admin.id)
+    db.session.add(subject)
+    db.session.flush()
+
+    chapter = Chapter(subject_id=subject.id, name='Chapter', description='bench',
+                      sequence_number=1, created_by=admin.id)
+    db.session.add(chapter)
+    db.session.flush()
+
+    quiz = Quiz(chapter_id=chapter.id, title='Bench quiz', description='bench',
+                start_date=date(2000, 1, 1), start_time=dtime(0, 0),
+                time_duration=60, passing_score=40, total_marks=question_count,
+                created_by=admin.id)
+    db.session.add(quiz)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(Question, [{
+        'quiz_id': quiz.id,
+        'question_text': f'Question {i}',
+        'option_1': 'a', 'option_2': 'b', 'option_3': 'c', 'option_4': 'd',
+        'correct_option': (i % 4) + 1,
+        'marks': 1,
+        'created_by': admin.id
+    } for i in range(question_count)])
+
+    db.session.bulk_insert_mappings(User, [{
+        'email': f'user{i}@example.com',
+        'password_hash': 'x',
+        'full_name': f'User {i}',
+        'qualification': 'bench',
+        'date_of_birth': date(2000, 1, 1)
+    } for i in range(user_count)])
+
+    db.session.commit()
+    return quiz
+
+
+class QueryCounter:
+    """Count SQL statements issued on the engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def timed(fn, repeat=5):
+    """Return the best wall time of fn over repeat runs, in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
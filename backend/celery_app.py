@@ -30,7 +30,12 @@ celery.conf.update(
     worker_prefetch_multiplier=1,
     task_acks_late=True,
     worker_disable_rate_limits=False,
-    imports=['tasks.reminder_tasks', 'tasks.export_tasks'],
+    imports=['tasks.reminder_tasks', 'tasks.export_tasks', 'tasks.regrade_tasks', 'tasks.grading_tasks', 'tasks.quiz_tasks'],
+    # Keep submit storms from queueing behind exports and emails:
+    # celery -A celery_app worker -Q grading
+    task_routes={
+        'tasks.grading_tasks.*': {'queue': 'grading'},
+    },
 )
 
 celery.conf.beat_schedule = {
@@ -44,6 +49,27 @@ celery.conf.beat_schedule = {
         'schedule': 86400.0,
         'kwargs': {}
     },
+    'expire-overdue-attempts': {
+        'task': 'tasks.grading_tasks.expire_overdue_attempts',
+        'schedule': 60.0,
+        'kwargs': {}
+    },
+    # Backstop for attempts missing from the Redis deadline index or stuck in grading
+    'expire-unindexed-attempts': {
+        'task': 'tasks.grading_tasks.expire_overdue_attempts',
+        'schedule': 600.0,
+        'kwargs': {'scan': True}
+    },
+    'lock-expired-quizzes': {
+        'task': 'tasks.quiz_tasks.lock_expired_quizzes',
+        'schedule': 60.0,
+        'kwargs': {}
+    },
+    'warm-upcoming-quizzes': {
+        'task': 'tasks.quiz_tasks.warm_upcoming_quizzes',
+        'schedule': 60.0,
+        'kwargs': {'lookahead_minutes': int(os.getenv('WARMUP_LOOKAHEAD_MINUTES', 10))}
+    },
     'monthly-activity-reports': {
         'task': 'tasks.reminder_tasks.send_monthly_activity_report',
         'schedule': 86400.0 * 30,
@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import logging
+from flask import request
+from controllers.extensions import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/msgpack',
+    'text/csv',
+    'text/html',
+    'text/plain',
+}
+
+
+def _choose_encoding():
+    """Best encoding the client accepts, brotli first when it is installed"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = request.accept_encodings.best_match(offered)
+    return best if best and request.accept_encodings[best] > 0 else None
+
+
+def compress_body(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def _variant_key(response, encoding):
+    """Cache key for a compressed representation, valid while the ETag is"""
+    etag, _ = response.get_etag()
+    if not etag:
+        return None
+    digest = hashlib.sha1(f"{request.full_path}|{response.mimetype}|{etag}".encode()).hexdigest()
+    return f"compressed:{encoding}:{digest}"
+
+
+def _read_file_body(response, max_size):
+    """
+    Buffer a send_file() response so it can be compressed. Generators and
+    files without a known, bounded length are left alone.
+    """
+    if response.content_length is None or response.content_length > max_size:
+        return False
+
+    original = response.response
+    response.direct_passthrough = False
+    data = response.get_data()
+    if hasattr(original, 'close'):
+        original.close()
+    response.set_data(data)
+    return True
+
+
+def init_compression(app):
+    """Compress eligible responses with brotli or gzip after each request"""
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+    app.config.setdefault('COMPRESS_MAX_FILE_SIZE', 20 * 1024 * 1024)
+    app.config.setdefault('COMPRESS_CACHE_TIMEOUT', 300)
+
+    @app.after_request
+    def compress_response(response):
+        config = app.config
+
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+            return response
+        if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        try:
+            if response.direct_passthrough:
+                if not _read_file_body(response, config['COMPRESS_MAX_FILE_SIZE']):
+                    return response
+                key = None
+            elif response.is_streamed:
+                return response
+            else:
+                key = _variant_key(response, encoding)
+
+            if response.content_length is not None and response.content_length < config['COMPRESS_MIN_SIZE']:
+                return response
+
+            body = cache.get(key) if key else None
+            if body is None:
+                body = compress_body(response.get_data(), encoding, config)
+                if key:
+                    cache.set(key, body, timeout=config['COMPRESS_CACHE_TIMEOUT'])
+
+            response.set_data(body)
+            response.headers['Content-Encoding'] = encoding
+
+            # Representations differ per encoding, so only a weak match remains valid
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+        except Exception as e:
+            logger.error(f"Error compressing response: {str(e)}")
+
+        return response
+
+    return app
@@ -14,19 +14,27 @@ redis_client = None
 
 cache = Cache()
 
+# Cache types backed by Redis; 'layered' adds an in-process LRU in front
+REDIS_CACHE_TYPES = {"redis", "layered"}
+CACHE_BACKENDS = {"layered": "controllers.layered_cache.LayeredCache"}
+
 def init_cache(app):
     """Initialize cache with application config"""
     global cache, redis_client
     
+    cache_type = app.config.get("CACHE_TYPE", "redis")
+    
     # Configure cache
     cache_config = {
-        "CACHE_TYPE": app.config.get("CACHE_TYPE", "redis"),
+        "CACHE_TYPE": CACHE_BACKENDS.get(cache_type.lower(), cache_type),
         "CACHE_REDIS_HOST": app.config.get("REDIS_HOST", "localhost"),
         "CACHE_REDIS_PORT": app.config.get("REDIS_PORT", 6379),
         "CACHE_REDIS_DB": app.config.get("CACHE_REDIS_DB", 0),
         "CACHE_DEFAULT_TIMEOUT": app.config.get("CACHE_TIMEOUT", 300),
         "CACHE_REDIS_SOCKET_TIMEOUT": 5,
-        "CACHE_REDIS_SOCKET_CONNECT_TIMEOUT": 5
+        "CACHE_REDIS_SOCKET_CONNECT_TIMEOUT": 5,
+        "CACHE_LOCAL_SIZE": app.config.get("CACHE_LOCAL_SIZE", 1024),
+        "CACHE_LOCAL_TTL": app.config.get("CACHE_LOCAL_TTL", 30)
     }
     
     logger.info(f"Initializing cache with config: {cache_config}")
@@ -34,7 +42,7 @@ def init_cache(app):
     try:
         cache.init_app(app, config=cache_config)
         
-        if app.config.get("CACHE_TYPE", "").lower() == "redis":
+        if cache_type.lower() in REDIS_CACHE_TYPES:
             try:
                 redis_client = redis.Redis(
                     host=app.config.get("REDIS_HOST", "localhost"),
@@ -0,0 +1,355 @@
+import os
+import time
+import uuid
+import itertools
+import orjson
+import logging
+import threading
+from collections import OrderedDict
+import redis
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'cache_invalidate'
+STATS_KEY = 'cache_stats'
+STATS_FLUSH_INTERVAL = 10
+
+# Counters kept per process and summed across workers in STATS_KEY
+STAT_FIELDS = ('local_hits', 'remote_hits', 'misses')
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded LRU of Python objects with per-entry expiry"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Value for key, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        """Keep value for the smaller of timeout (0 = no expiry) and the TTL cap"""
+        ttl = min(timeout, self.ttl) if timeout else self.ttl
+        if ttl <= 0 or value is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LayeredCache(BaseCache):
+    """
+    In-process LRU in front of Redis
+
+    Reads check the local tier first and fill it from Redis. Writes go to
+    Redis, update this process's tier and publish the keys on
+    INVALIDATION_CHANNEL, so every other worker evicts its local copy.
+    Local entries live at most CACHE_LOCAL_TTL seconds, which bounds
+    staleness if an invalidation message is lost.
+
+    Local values are shared between requests, so callers must not mutate
+    what get() returns.
+    """
+
+    def __init__(self, remote, client, local_size=1024, local_ttl=30,
+                 channel=INVALIDATION_CHANNEL, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.remote = remote
+        self.client = client
+        self.channel = channel
+        self.local = LocalLRU(local_size, local_ttl)
+        self._pid = None
+        self._ensure_process()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        remote = RedisCache.factory(app, config, args, dict(kwargs))
+        client = redis.Redis(
+            host=config.get('CACHE_REDIS_HOST', 'localhost'),
+            port=config.get('CACHE_REDIS_PORT', 6379),
+            db=config.get('CACHE_REDIS_DB', 0),
+            decode_responses=True,
+            socket_connect_timeout=config.get('CACHE_REDIS_SOCKET_CONNECT_TIMEOUT', 5),
+            health_check_interval=30
+        )
+        return cls(
+            remote,
+            client,
+            local_size=config.get('CACHE_LOCAL_SIZE', 1024),
+            local_ttl=config.get('CACHE_LOCAL_TTL', 30),
+            default_timeout=kwargs.get('default_timeout', 300)
+        )
+
+    # Per-process state
+
+    def _ensure_process(self):
+        """
+        (Re)create per-process state after a fork: gunicorn workers inherit
+        the master's tier, but not its subscriber thread
+        """
+        if self._pid == os.getpid():
+            return
+
+        self._pid = os.getpid()
+        self._sender = uuid.uuid4().hex
+        self._subscriber = None
+        self._subscriber_lock = threading.Lock()
+        # Bumped on every eviction, so a fill that raced with one is dropped
+        self._generations = itertools.count(1)
+        self._generation = 0
+        self._stats = dict.fromkeys(STAT_FIELDS, 0)
+        self._stats_flushed_at = time.monotonic()
+        self._stats_lock = threading.Lock()
+        self.local.clear()
+
+    def _subscribe(self):
+        """Start this process's invalidation listener, once"""
+        if self._subscriber is not None:
+            return
+
+        with self._subscriber_lock:
+            if self._subscriber is not None:
+                return
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_invalidate})
+                self._subscriber = pubsub.run_in_thread(
+                    sleep_time=1,
+                    daemon=True,
+                    exception_handler=self._on_subscriber_error
+                )
+            except Exception as e:
+                logger.error(f"Error subscribing to cache invalidations: {str(e)}")
+
+    def _on_subscriber_error(self, error, pubsub, thread):
+        # Invalidations may have been missed, so nothing local can be trusted
+        logger.error(f"Cache invalidation listener stopped: {str(error)}")
+        thread.stop()
+        self._subscriber = None
+        self._evict_all()
+
+    def _on_invalidate(self, message):
+        try:
+            payload = orjson.loads(message['data'])
+        except Exception:
+            return
+        if payload.get('sender') == self._sender:
+            return
+
+        if payload.get('clear'):
+            self._evict_all()
+        else:
+            self._evict(*payload.get('keys', ()))
+
+    def _evict(self, *keys):
+        self._generation = next(self._generations)
+        self.local.delete(*keys)
+
+    def _evict_all(self):
+        self._generation = next(self._generations)
+        self.local.clear()
+
+    def _publish(self, keys=(), clear=False):
+        payload = {'sender': self._sender}
+        if clear:
+            payload['clear'] = True
+        else:
+            payload['keys'] = list(keys)
+        try:
+            self.client.publish(self.channel, orjson.dumps(payload))
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {str(e)}")
+
+    def _before(self):
+        self._ensure_process()
+        self._subscribe()
+
+    # Hit ratios
+
+    def _count(self, local_hits=0, remote_hits=0, misses=0):
+        with self._stats_lock:
+            self._stats['local_hits'] += local_hits
+            self._stats['remote_hits'] += remote_hits
+            self._stats['misses'] += misses
+            due = time.monotonic() - self._stats_flushed_at >= STATS_FLUSH_INTERVAL
+        if due:
+            self._flush_stats()
+
+    def _flush_stats(self):
+        """Add this process's counters to the cluster-wide totals"""
+        with self._stats_lock:
+            counts, self._stats = self._stats, dict.fromkeys(STAT_FIELDS, 0)
+            self._stats_flushed_at = time.monotonic()
+        try:
+            pipe = self.client.pipeline()
+            for field, count in counts.items():
+                if count:
+                    pipe.hincrby(STATS_KEY, field, count)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error flushing cache stats: {str(e)}")
+
+    def stats(self):
+        """Lookup counts and hit ratios per tier, summed over all workers"""
+        self._ensure_process()
+        self._flush_stats()
+        try:
+            totals = self.client.hgetall(STATS_KEY)
+        except Exception as e:
+            logger.error(f"Error reading cache stats: {str(e)}")
+            totals = {}
+
+        counts = {field: int(totals.get(field, 0)) for field in STAT_FIELDS}
+        lookups = sum(counts.values())
+        remote_lookups = lookups - counts['local_hits']
+
+        return {
+            **counts,
+            'lookups': lookups,
+            'local_hit_ratio': round(counts['local_hits'] / lookups, 4) if lookups else None,
+            'remote_hit_ratio': round(counts['remote_hits'] / remote_lookups, 4) if remote_lookups else None,
+            'hit_ratio': round((lookups - counts['misses']) / lookups, 4) if lookups else None,
+            'local_entries': len(self.local),
+            'local_size': self.local.max_size,
+            'local_ttl': self.local.ttl
+        }
+
+    # Cache API
+
+    def get(self, key):
+        self._before()
+        value = self.local.get(key)
+        if value is not None:
+            self._count(local_hits=1)
+            return value
+
+        generation = self._generation
+        value = self.remote.get(key)
+        if value is None:
+            self._count(misses=1)
+            return None
+
+        self._count(remote_hits=1)
+        if generation == self._generation:
+            self.local.set(key, value, self.local.ttl)
+        return value
+
+    def get_many(self, *keys):
+        self._before()
+        values = {key: self.local.get(key) for key in keys}
+        missing = [key for key in keys if values[key] is None]
+        local_hits = len(keys) - len(missing)
+
+        remote_hits = 0
+        if missing:
+            generation = self._generation
+            for key, value in zip(missing, self.remote.get_many(*missing)):
+                if value is None:
+                    continue
+                values[key] = value
+                remote_hits += 1
+                if generation == self._generation:
+                    self.local.set(key, value, self.local.ttl)
+
+        self._count(local_hits=local_hits, remote_hits=remote_hits, misses=len(missing) - remote_hits)
+        return [values[key] for key in keys]
+
+    def has(self, key):
+        self._before()
+        if self.local.get(key) is not None:
+            return True
+        return self.remote.has(key)
+
+    def set(self, key, value, timeout=None):
+        self._before()
+        timeout = self._normalize_timeout(timeout)
+        result = self.remote.set(key, value, timeout=timeout)
+        self._evict(key)
+        if result:
+            self.local.set(key, value, timeout)
+        self._publish([key])
+        return result
+
+    def set_many(self, mapping, timeout=None):
+        self._before()
+        timeout = self._normalize_timeout(timeout)
+        stored = self.remote.set_many(mapping, timeout=timeout)
+        self._evict(*mapping)
+        for key in stored:
+            self.local.set(key, mapping[key], timeout)
+        self._publish(mapping)
+        return stored
+
+    def add(self, key, value, timeout=None):
+        self._before()
+        timeout = self._normalize_timeout(timeout)
+        added = self.remote.add(key, value, timeout=timeout)
+        if added:
+            self._evict(key)
+            self.local.set(key, value, timeout)
+            self._publish([key])
+        return added
+
+    def delete(self, key):
+        self._before()
+        result = self.remote.delete(key)
+        self._evict(key)
+        self._publish([key])
+        return result
+
+    def delete_many(self, *keys):
+        self._before()
+        result = self.remote.delete_many(*keys)
+        self._evict(*keys)
+        self._publish(keys)
+        return result
+
+    def clear(self):
+        self._before()
+        result = self.remote.clear()
+        self._evict_all()
+        self._publish(clear=True)
+        return result
+
+    def inc(self, key, delta=1):
+        self._before()
+        result = self.remote.inc(key, delta=delta)
+        self._evict(key)
+        self._publish([key])
+        return result
+
+    def dec(self, key, delta=1):
+        self._before()
+        result = self.remote.dec(key, delta=delta)
+        self._evict(key)
+        self._publish([key])
+        return result
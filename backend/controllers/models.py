@@ -2,6 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from controllers.extensions import db
 from datetime import datetime, timedelta
+from sqlalchemy import event, select, update, func
+from sqlalchemy.orm import Session, object_session
+from collections import Counter
+from itertools import chain
 import random
 
 class User(db.Model):
@@ -12,7 +16,7 @@ class User(db.Model):
     qualification = db.Column(db.String(100), nullable=False)
     date_of_birth = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
     @property
     def password(self):
@@ -25,6 +29,9 @@ class User(db.Model):
     def verify_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def cache_tags(self):
+        return [f"user:{self.id}", "users"]
+
 class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -49,29 +56,41 @@ class Subject(db.Model):
     description = db.Column(db.Text, nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     is_active = db.Column(db.Boolean, default=True)
 
+    # Maintained by maintain_counters; repair with controllers.schema.repair_counters
+    chapter_count = db.Column(db.Integer, default=0)
+    quiz_count = db.Column(db.Integer, default=0)
+
     chapters = db.relationship('Chapter', backref='subject', lazy=True, cascade='all, delete-orphan')
     creator = db.relationship('Admin', backref='created_subjects')
 
+    def cache_tags(self):
+        return [f"subject:{self.id}", "subjects"]
+
 class Chapter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     sequence_number = db.Column(db.Integer, nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     is_active = db.Column(db.Boolean, default=True)
 
+    quiz_count = db.Column(db.Integer, default=0)
+
     quizzes = db.relationship('Quiz', backref='chapter', lazy=True, cascade='all, delete-orphan')
     creator = db.relationship('Admin', backref='created_chapters')
 
+    def cache_tags(self):
+        return [f"chapter:{self.id}", f"subject:{self.subject_id}"]
+
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=False)
     
@@ -79,70 +98,104 @@ class Quiz(db.Model):
     start_time = db.Column(db.Time, nullable=False)  
     end_date = db.Column(db.Date, nullable=True)  
     end_time = db.Column(db.Time, nullable=True)  
+    
+    # start/end date and time combined, so availability is an indexed range predicate
+    start_at = db.Column(db.DateTime, nullable=True, index=True)
+    end_at = db.Column(db.DateTime, nullable=True, index=True)
 
     time_duration = db.Column(db.Integer, nullable=False)  
     passing_score = db.Column(db.Integer, nullable=False)
     total_marks = db.Column(db.Integer, nullable=False)
     
     auto_lock_after_expiry = db.Column(db.Boolean, default=True)
-    is_locked = db.Column(db.Boolean, default=False) 
+    is_locked = db.Column(db.Boolean, default=False, index=True) 
     
     created_by = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     is_active = db.Column(db.Boolean, default=True)
 
+    question_count = db.Column(db.Integer, default=0)
+
     questions = db.relationship('Question', backref='quiz', lazy=True, cascade='all, delete-orphan')
     creator = db.relationship('Admin', backref='created_quizzes')
     attempts = db.relationship('QuizAttempt', backref='quiz', cascade='all, delete-orphan')
     scores = db.relationship('Score', backref='quiz', cascade='all, delete-orphan')
     
+    def cache_tags(self):
+        return [f"quiz:{self.id}", f"chapter:{self.chapter_id}", "quizzes"]
+    
+    @staticmethod
+    def combine_schedule(day, at):
+        """Combine a date and time column pair, or None if either is unset"""
+        if not day or not at:
+            return None
+        return datetime.combine(day, at)
+    
+    @staticmethod
+    def time_remaining(target, now=None):
+        """Time left until target, or None if it is unset or has passed"""
+        if target is None:
+            return None
+        
+        now = now or datetime.now()
+        if now >= target:
+            return None
+            
+        return target - now
+    
+    @classmethod
+    def available_filter(cls, now=None):
+        """SQL predicate matching quizzes that are currently available for attempts"""
+        now = now or datetime.now()
+        return db.and_(
+            cls.is_active == True,
+            cls.is_locked == False,
+            cls.start_at <= now,
+            db.or_(cls.end_at.is_(None), cls.end_at >= now)
+        )
+    
+    def schedule_bounds(self):
+        start_at = self.start_at or self.combine_schedule(self.start_date, self.start_time)
+        end_at = self.end_at or self.combine_schedule(self.end_date, self.end_time)
+        return start_at, end_at
+    
     def is_available(self):
         """Check if quiz is currently available for attempts"""
         if not self.is_active or self.is_locked:
             return False
             
         now = datetime.now()
+        start_at, end_at = self.schedule_bounds()
         
         # Check start time
-        start_datetime = datetime.combine(self.start_date, self.start_time)
-        if now < start_datetime:
+        if now < start_at:
             return False
             
         # Check end time if set
-        if self.end_date and self.end_time:
-            end_datetime = datetime.combine(self.end_date, self.end_time)
-            if now > end_datetime:
-                return False
+        if end_at and now > end_at:
+            return False
                 
         return True
     
     def time_until_start(self):
         """Get time until quiz becomes available"""
-        now = datetime.now()
-        start_datetime = datetime.combine(self.start_date, self.start_time)
-        
-        if now >= start_datetime:
-            return None
-            
-        return start_datetime - now
+        return self.time_remaining(self.schedule_bounds()[0])
     
     def time_until_end(self):
         """Get time until quiz expires"""
-        if not self.end_date or not self.end_time:
-            return None
-            
-        now = datetime.now()
-        end_datetime = datetime.combine(self.end_date, self.end_time)
-        
-        if now >= end_datetime:
-            return None
-            
-        return end_datetime - now
+        return self.time_remaining(self.schedule_bounds()[1])
+
+@event.listens_for(Quiz, 'before_insert')
+@event.listens_for(Quiz, 'before_update')
+def sync_quiz_schedule(mapper, connection, target):
+    """Keep start_at/end_at in step with the separate date and time columns"""
+    target.start_at = Quiz.combine_schedule(target.start_date, target.start_time)
+    target.end_at = Quiz.combine_schedule(target.end_date, target.end_time)
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     question_text = db.Column(db.Text, nullable=False)
     option_1 = db.Column(db.String(255), nullable=False)
     option_2 = db.Column(db.String(255), nullable=False)
@@ -152,11 +205,72 @@ class Question(db.Model):
     marks = db.Column(db.Integer, nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
     creator = db.relationship('Admin', backref='created_questions')
     responses = db.relationship('QuizResponse', backref='question', cascade='all, delete-orphan')
 
+    def cache_tags(self):
+        return [f"question:{self.id}", f"quiz:{self.quiz_id}"]
+
+def _count_change(connection, target, delta):
+    """Record how a flushed insert or delete moves its parents' counters"""
+    changes = object_session(target).info.setdefault('counter_changes', Counter())
+
+    if isinstance(target, Chapter):
+        changes[(Subject, 'chapter_count', target.subject_id)] += delta
+    elif isinstance(target, Quiz):
+        changes[(Chapter, 'quiz_count', target.chapter_id)] += delta
+        # Children flush before their parents are deleted, so the chapter is still there
+        subject_id = connection.execute(
+            select(Chapter.subject_id).where(Chapter.id == target.chapter_id)
+        ).scalar()
+        changes[(Subject, 'quiz_count', subject_id)] += delta
+    elif isinstance(target, Question):
+        changes[(Quiz, 'question_count', target.quiz_id)] += delta
+
+for _model in (Chapter, Quiz, Question):
+    event.listen(_model, 'after_insert', lambda mapper, connection, target: _count_change(connection, target, 1))
+    event.listen(_model, 'after_delete', lambda mapper, connection, target: _count_change(connection, target, -1))
+
+@event.listens_for(Session, 'after_flush')
+def maintain_counters(session, flush_context):
+    """Apply the counter changes of a flush as one atomic UPDATE per parent row"""
+    changes = session.info.pop('counter_changes', None)
+    if not changes:
+        return
+
+    connection = session.connection()
+    for (model, column, row_id), delta in changes.items():
+        if not delta or row_id is None:
+            continue
+        counter = model.__table__.c[column]
+        connection.execute(
+            update(model.__table__)
+            .where(model.__table__.c.id == row_id)
+            .values({column: func.coalesce(counter, 0) + delta})
+        )
+
+@event.listens_for(Session, 'after_flush')
+def collect_cache_tags(session, flush_context):
+    """Remember the cache tags of everything a flush touched until commit"""
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if hasattr(obj, 'cache_tags'):
+            tags.update(obj.cache_tags())
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_cache_tags(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        from utils.cache_tags import invalidate_tags
+        invalidate_tags(tags)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_pending_changes(session, previous_transaction):
+    session.info.pop('counter_changes', None)
+    session.info.pop('cache_tags', None)
+
 class Score(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -166,6 +280,9 @@ class Score(db.Model):
 
     user = db.relationship('User', backref='scores', lazy=True)
 
+    def cache_tags(self):
+        return [f"user:{self.user_id}"]
+
 class QuizAttempt(db.Model):
     """Model for storing quiz attempts by users"""
     id = db.Column(db.Integer, primary_key=True)
@@ -183,12 +300,21 @@ class QuizAttempt(db.Model):
     status = db.Column(db.String(20), nullable=False, default='in_progress')  
     is_passed = db.Column(db.Boolean, nullable=True)  
     
+    # Seeds the attempt's question order so it is stable across reloads
+    shuffle_seed = db.Column(db.Integer, nullable=True)
+    
+    # Raw answers of an async submit, kept until the grading task has run
+    submitted_answers = db.Column(db.Text, nullable=True)
+    
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
     user = db.relationship('User', backref='quiz_attempts')
     responses = db.relationship('QuizResponse', backref='attempt', cascade='all, delete-orphan')
 
+    def cache_tags(self):
+        return [f"attempt:{self.id}", f"user:{self.user_id}"]
+
 class QuizResponse(db.Model):
     """Model for storing individual question responses in a quiz attempt"""
     id = db.Column(db.Integer, primary_key=True)
@@ -199,4 +325,4 @@ class QuizResponse(db.Model):
     score = db.Column(db.Integer, nullable=True)  
     
     created_at = db.Column(db.DateTime, server_default=db.func.now())
-    updated_at = db.Column(db.DateTime, server_default=db.func.now(), server_onupdate=db.func.now())
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
\ No newline at end of file
@@ -0,0 +1,101 @@
+from sqlalchemy import inspect, text, select, update, func
+from controllers.extensions import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns():
+    """
+    Add model columns and indexes that db.create_all() cannot add to
+    tables which already exist. Only nullable columns are added.
+    """
+    inspector = inspect(db.engine)
+    dialect = db.engine.dialect
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+
+            column_type = column.type.compile(dialect=dialect)
+            db.session.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+            added.append(f"{table.name}.{column.name}")
+
+        db.session.commit()
+
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+    if added:
+        logger.info(f"Added columns: {', '.join(added)}")
+
+    return added
+
+
+def backfill_quiz_schedule():
+    """Fill start_at/end_at for quizzes created before the combined columns existed"""
+    from controllers.models import Quiz
+
+    rows = db.session.query(
+        Quiz.id,
+        Quiz.start_date,
+        Quiz.start_time,
+        Quiz.end_date,
+        Quiz.end_time
+    ).filter(Quiz.start_at.is_(None)).all()
+
+    if rows:
+        db.session.bulk_update_mappings(Quiz, [{
+            'id': q.id,
+            'start_at': Quiz.combine_schedule(q.start_date, q.start_time),
+            'end_at': Quiz.combine_schedule(q.end_date, q.end_time)
+        } for q in rows])
+        db.session.commit()
+        logger.info(f"Backfilled schedule for {len(rows)} quizzes")
+
+    return len(rows)
+
+
+COUNTER_COLUMNS = {'subject.chapter_count', 'subject.quiz_count', 'chapter.quiz_count', 'quiz.question_count'}
+
+
+def repair_counters():
+    """Recompute every denormalized chapter, quiz and question count in bulk"""
+    from controllers.models import Subject, Chapter, Quiz, Question
+
+    statements = [
+        update(Subject).values(
+            chapter_count=select(func.count(Chapter.id))
+                .where(Chapter.subject_id == Subject.id).scalar_subquery(),
+            quiz_count=select(func.count(Quiz.id))
+                .join(Chapter, Quiz.chapter_id == Chapter.id)
+                .where(Chapter.subject_id == Subject.id).scalar_subquery()
+        ),
+        update(Chapter).values(
+            quiz_count=select(func.count(Quiz.id))
+                .where(Quiz.chapter_id == Chapter.id).scalar_subquery()
+        ),
+        update(Quiz).values(
+            question_count=select(func.count(Question.id))
+                .where(Question.quiz_id == Quiz.id).scalar_subquery()
+        ),
+    ]
+
+    for statement in statements:
+        db.session.execute(statement.execution_options(synchronize_session=False))
+    db.session.commit()
+    logger.info("Repaired chapter, quiz and question counters")
+
+
+def upgrade_schema():
+    """Bring an existing database up to the current models"""
+    added = add_missing_columns()
+    backfill_quiz_schedule()
+    if COUNTER_COLUMNS.intersection(added):
+        repair_counters()
@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import jwt_required
 from controllers.models import Admin, User, Subject, Chapter, Quiz, Question
-from controllers.extensions import db
+from controllers.extensions import db, cache
+from sqlalchemy import or_
 from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from utils.answer_keys import bump_answer_key_version, get_answer_key_version
+from utils.catalog import refresh_catalog
+from utils.fieldsets import Fieldset, iso, hm
+from utils.pagination import page_params, keyset_page, paginated_response
+from utils.conditional import conditional, collection_version, tag_version, catalog_version, catalog_validator, scheduled_catalog_validator, combine
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -24,56 +32,172 @@ def admin_required(fn):
     wrapper.__name__ = fn.__name__
     return wrapper
 
+
+def _quiz_is_available(row):
+    now = datetime.now()
+    return bool(
+        row.is_active and not row.is_locked
+        and row.start_at and row.start_at <= now
+        and (row.end_at is None or row.end_at >= now)
+    )
+
+
+def _time_until(value):
+    remaining = Quiz.time_remaining(value)
+    return str(remaining) if remaining else None
+
+
+# Sparse fieldsets: ?fields= picks both the selected columns and the serialized keys
+USER_FIELDS = Fieldset(
+    User,
+    id=User.id,
+    email=User.email,
+    full_name=User.full_name,
+    qualification=User.qualification,
+    date_of_birth=(User.date_of_birth, iso),
+    created_at=(User.created_at, iso)
+)
+USER_DEFAULT = ['id', 'email', 'full_name', 'qualification', 'date_of_birth', 'created_at']
+
+SUBJECT_FIELDS = Fieldset(
+    Subject,
+    id=Subject.id,
+    name=Subject.name,
+    description=Subject.description,
+    is_active=Subject.is_active,
+    created_at=(Subject.created_at, iso)
+)
+SUBJECT_DEFAULT = ['id', 'name', 'description', 'is_active', 'created_at']
+
+CHAPTER_FIELDS = Fieldset(
+    Chapter,
+    id=Chapter.id,
+    name=Chapter.name,
+    description=Chapter.description,
+    subject_id=Chapter.subject_id,
+    sequence_number=Chapter.sequence_number,
+    is_active=Chapter.is_active,
+    created_at=(Chapter.created_at, iso)
+)
+CHAPTER_DEFAULT = ['id', 'name', 'description', 'sequence_number', 'is_active', 'created_at']
+
+QUIZ_FIELDS = Fieldset(
+    Quiz,
+    id=Quiz.id,
+    title=Quiz.title,
+    description=Quiz.description,
+    start_date=(Quiz.start_date, iso),
+    start_time=(Quiz.start_time, hm),
+    end_date=(Quiz.end_date, iso),
+    end_time=(Quiz.end_time, hm),
+    time_duration=Quiz.time_duration,
+    passing_score=Quiz.passing_score,
+    total_marks=Quiz.total_marks,
+    auto_lock_after_expiry=Quiz.auto_lock_after_expiry,
+    is_locked=Quiz.is_locked,
+    is_active=Quiz.is_active,
+    chapter_id=Quiz.chapter_id,
+    created_at=(Quiz.created_at, iso),
+    is_available=([Quiz.is_active, Quiz.is_locked, Quiz.start_at, Quiz.end_at], _quiz_is_available),
+    time_until_start=(Quiz.start_at, _time_until),
+    time_until_end=(Quiz.end_at, _time_until)
+)
+QUIZ_DEFAULT = [
+    'id', 'title', 'description', 'start_date', 'start_time', 'end_date', 'end_time',
+    'time_duration', 'passing_score', 'total_marks', 'auto_lock_after_expiry', 'is_locked',
+    'is_active', 'is_available', 'time_until_start', 'time_until_end', 'created_at'
+]
+
+QUESTION_FIELDS = Fieldset(
+    Question,
+    id=Question.id,
+    question_text=Question.question_text,
+    option_1=Question.option_1,
+    option_2=Question.option_2,
+    option_3=Question.option_3,
+    option_4=Question.option_4,
+    correct_option=Question.correct_option,
+    marks=Question.marks,
+    created_at=(Question.created_at, iso)
+)
+QUESTION_DEFAULT = [
+    'id', 'question_text', 'option_1', 'option_2', 'option_3', 'option_4',
+    'correct_option', 'marks', 'created_at'
+]
+
+
+def _user_search(term):
+    """Criteria for users whose name or email contains term, case-insensitively"""
+    if not term:
+        return ()
+    pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return (or_(User.full_name.ilike(pattern, escape='\\'), User.email.ilike(pattern, escape='\\')),)
+
+
+def _users_version(**kwargs):
+    return tag_version('users')
+
+
+def _questions_version(quiz_id):
+    # Question edits bump the answer key version even within the same second
+    return combine(
+        collection_version(Question, Question.quiz_id == quiz_id),
+        (f"key-{get_answer_key_version(quiz_id)}", None)
+    )
+
+
+def _dashboard_version(**kwargs):
+    return combine(tag_version('users'), catalog_version())
+
 # User Management
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
+@conditional(_users_version)
 def get_users():
     try:
-        users = User.query.all()
-        user_list = [{
-            'id': user.id,
-            'email': user.email,
-            'full_name': user.full_name,
-            'qualification': user.qualification,
-            'date_of_birth': user.date_of_birth.isoformat(),
-            'created_at': user.created_at.isoformat()
-        } for user in users]
-        
-        return jsonify(user_list)  
+        names = USER_FIELDS.requested(USER_DEFAULT)
+        after, limit = page_params()
+        # ?q= searches every user, not just the pages a client has loaded
+        criteria = _user_search(request.args.get('q', '').strip())
+        users, next_cursor = keyset_page(USER_FIELDS.query(names).filter(*criteria), User.id, after, limit)
+        user_list = [USER_FIELDS.serialize(user, names) for user in users]
+        
+        return paginated_response(user_list, next_cursor, limit, User, *criteria)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @admin_bp.route('/subjects', methods=['GET'])
 @admin_required
+@conditional(catalog_validator)
 def get_subjects():
     try:
-        subjects = Subject.query.all()
-        subject_list = [{
-            'id': subject.id,
-            'name': subject.name,
-            'description': subject.description,
-            'is_active': subject.is_active,
-            'created_at': subject.created_at.isoformat()
-        } for subject in subjects]
+        names = SUBJECT_FIELDS.requested(SUBJECT_DEFAULT)
+        after, limit = page_params()
+        subjects, next_cursor = keyset_page(SUBJECT_FIELDS.query(names), Subject.id, after, limit)
+        subject_list = [SUBJECT_FIELDS.serialize(subject, names) for subject in subjects]
 
-        return jsonify(subject_list)
+        return paginated_response(subject_list, next_cursor, limit, Subject)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500 
 
 # Subject Management
 @admin_bp.route('/subjects/<int:subject_id>', methods=['GET'])
 @admin_required
+@conditional(catalog_validator)
 def get_subject(subject_id):
     try:
-        subject = Subject.query.get_or_404(subject_id)
-        
-        return jsonify({
-            'id': subject.id,
-            'name': subject.name,
-            'description': subject.description,
-            'is_active': subject.is_active,
-            'created_at': subject.created_at.isoformat() if subject.created_at else None
-        })
+        names = SUBJECT_FIELDS.requested(SUBJECT_DEFAULT)
+        subject = SUBJECT_FIELDS.query(names).filter(Subject.id == subject_id).first()
+        if not subject:
+            return jsonify({"msg": "Subject not found"}), 404
+        
+        return jsonify(SUBJECT_FIELDS.serialize(subject, names))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -108,6 +232,8 @@ def create_subject():
         db.session.add(new_subject)
         db.session.commit()
         
+        refresh_catalog(subject_id=new_subject.id)
+        
         return jsonify({
             'id': new_subject.id,
             'name': new_subject.name,
@@ -135,6 +261,8 @@ def update_subject(subject_id):
         
         db.session.commit()
         
+        refresh_catalog(subject_id=subject.id)
+        
         return jsonify({
             'id': subject.id,
             'name': subject.name,
@@ -156,6 +284,8 @@ def delete_subject(subject_id):
         db.session.delete(subject)
         db.session.commit()
         
+        refresh_catalog(subject_id=subject_id)
+        
         return jsonify({"msg": "Subject deleted successfully"}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -166,19 +296,19 @@ def delete_subject(subject_id):
 # Chapter Management
 @admin_bp.route('/subjects/<int:subject_id>/chapters', methods=['GET'])
 @admin_required
+@conditional(catalog_validator)
 def get_chapters(subject_id):
     try:
-        chapters = Chapter.query.filter_by(subject_id=subject_id).all()
-        chapter_list = [{
-            'id': chapter.id,
-            'name': chapter.name,
-            'description': chapter.description,
-            'sequence_number': chapter.sequence_number,
-            'is_active': chapter.is_active,
-            'created_at': chapter.created_at.isoformat()
-        } for chapter in chapters]
+        names = CHAPTER_FIELDS.requested(CHAPTER_DEFAULT)
+        after, limit = page_params()
+        chapters, next_cursor = keyset_page(
+            CHAPTER_FIELDS.query(names).filter(Chapter.subject_id == subject_id), Chapter.id, after, limit
+        )
+        chapter_list = [CHAPTER_FIELDS.serialize(chapter, names) for chapter in chapters]
         
-        return jsonify(chapter_list), 200
+        return paginated_response(chapter_list, next_cursor, limit, Chapter, Chapter.subject_id == subject_id), 200
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": f"Error retrieving chapters: {str(e)}"}), 500
 
@@ -211,6 +341,8 @@ def create_chapter(subject_id):
         db.session.add(new_chapter)
         db.session.commit()
         
+        refresh_catalog(subject_id=subject_id)
+        
         return jsonify({
             'id': new_chapter.id,
             'name': new_chapter.name,
@@ -226,19 +358,17 @@ def create_chapter(subject_id):
     
 @admin_bp.route('/chapters/<int:chapter_id>', methods=['GET'])
 @admin_required
+@conditional(catalog_validator)
 def get_chapter(chapter_id):
     try:
-        chapter = Chapter.query.get_or_404(chapter_id)
+        names = CHAPTER_FIELDS.requested(CHAPTER_DEFAULT + ['subject_id'])
+        chapter = CHAPTER_FIELDS.query(names).filter(Chapter.id == chapter_id).first()
+        if not chapter:
+            return jsonify({"msg": "Chapter not found"}), 404
 
-        return jsonify({
-            'id': chapter.id,
-            'name': chapter.name,
-            'description': chapter.description,
-            'subject_id': chapter.subject_id,
-            'sequence_number': chapter.sequence_number,
-            'is_active': chapter.is_active,
-            'created_at': chapter.created_at.isoformat() if chapter.created_at else None
-        })
+        return jsonify(CHAPTER_FIELDS.serialize(chapter, names))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -255,6 +385,8 @@ def update_chapter(chapter_id):
         
         db.session.commit()
         
+        refresh_catalog(subject_id=chapter.subject_id)
+        
         return jsonify({
             'id': chapter.id,
             'name': chapter.name,
@@ -273,10 +405,13 @@ def update_chapter(chapter_id):
 def delete_chapter(chapter_id):
     try:
         chapter = Chapter.query.get_or_404(chapter_id)
+        subject_id = chapter.subject_id
         
         db.session.delete(chapter)
         db.session.commit()
         
+        refresh_catalog(subject_id=subject_id)
+        
         return jsonify({"msg": "Chapter deleted successfully"}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -287,30 +422,19 @@ def delete_chapter(chapter_id):
 # Quiz Management
 @admin_bp.route('/chapters/<int:chapter_id>/quizzes', methods=['GET'])
 @admin_required
+@conditional(scheduled_catalog_validator)
 def get_quizzes(chapter_id):
     try:
-        quizzes = Quiz.query.filter_by(chapter_id=chapter_id).all()
-        quiz_list = [{
-            'id': quiz.id,
-            'title': quiz.title,
-            'description': quiz.description,
-            'start_date': quiz.start_date.isoformat() if quiz.start_date else None,
-            'start_time': quiz.start_time.strftime('%H:%M') if quiz.start_time else None,
-            'end_date': quiz.end_date.isoformat() if quiz.end_date else None,
-            'end_time': quiz.end_time.strftime('%H:%M') if quiz.end_time else None,
-            'time_duration': quiz.time_duration,
-            'passing_score': quiz.passing_score,
-            'total_marks': quiz.total_marks,
-            'auto_lock_after_expiry': quiz.auto_lock_after_expiry,
-            'is_locked': quiz.is_locked,
-            'is_active': quiz.is_active,
-            'is_available': quiz.is_available(),
-            'time_until_start': str(quiz.time_until_start()) if quiz.time_until_start() else None,
-            'time_until_end': str(quiz.time_until_end()) if quiz.time_until_end() else None,
-            'created_at': quiz.created_at.isoformat() if quiz.created_at else None
-        } for quiz in quizzes]
-
-        return jsonify(quiz_list)
+        names = QUIZ_FIELDS.requested(QUIZ_DEFAULT)
+        after, limit = page_params()
+        quizzes, next_cursor = keyset_page(
+            QUIZ_FIELDS.query(names).filter(Quiz.chapter_id == chapter_id), Quiz.id, after, limit
+        )
+        quiz_list = [QUIZ_FIELDS.serialize(quiz, names) for quiz in quizzes]
+
+        return paginated_response(quiz_list, next_cursor, limit, Quiz, Quiz.chapter_id == chapter_id)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -363,6 +487,8 @@ def create_quiz(chapter_id):
         db.session.add(new_quiz)
         db.session.commit()
         
+        refresh_catalog(chapter_id=chapter_id)
+        
         return jsonify({
             'id': new_quiz.id,
             'message': 'Quiz created successfully'
@@ -374,30 +500,17 @@ def create_quiz(chapter_id):
 
 @admin_bp.route('/quizzes/<int:quiz_id>', methods=['GET'])
 @admin_required
+@conditional(scheduled_catalog_validator)
 def get_quiz(quiz_id):
     try:
-        quiz = Quiz.query.get_or_404(quiz_id)
+        names = QUIZ_FIELDS.requested(QUIZ_DEFAULT + ['chapter_id'])
+        quiz = QUIZ_FIELDS.query(names).filter(Quiz.id == quiz_id).first()
+        if not quiz:
+            return jsonify({"msg": "Quiz not found"}), 404
 
-        return jsonify({
-            'id': quiz.id,
-            'title': quiz.title,
-            'description': quiz.description,
-            'start_date': quiz.start_date.isoformat(),
-            'start_time': quiz.start_time.strftime('%H:%M'),
-            'end_date': quiz.end_date.isoformat() if quiz.end_date else None,
-            'end_time': quiz.end_time.strftime('%H:%M') if quiz.end_time else None,
-            'time_duration': quiz.time_duration,
-            'passing_score': quiz.passing_score,
-            'total_marks': quiz.total_marks,
-            'auto_lock_after_expiry': quiz.auto_lock_after_expiry,
-            'is_locked': quiz.is_locked,
-            'chapter_id': quiz.chapter_id,
-            'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
-            'is_active': quiz.is_active,
-            'is_available': quiz.is_available(),
-            'time_until_start': str(quiz.time_until_start()) if quiz.time_until_start() else None,
-            'time_until_end': str(quiz.time_until_end()) if quiz.time_until_end() else None
-        })
+        return jsonify(QUIZ_FIELDS.serialize(quiz, names))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -410,6 +523,8 @@ def lock_quiz(quiz_id):
         quiz.is_locked = True
         db.session.commit()
         
+        refresh_catalog(chapter_id=quiz.chapter_id)
+        
         return jsonify({"msg": "Quiz locked successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -422,6 +537,8 @@ def unlock_quiz(quiz_id):
         quiz.is_locked = False
         db.session.commit()
         
+        refresh_catalog(chapter_id=quiz.chapter_id)
+        
         return jsonify({"msg": "Quiz unlocked successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -502,6 +619,8 @@ def update_quiz(quiz_id):
         
         db.session.commit()
         
+        refresh_catalog(chapter_id=quiz.chapter_id)
+        
         return jsonify({
             "msg": "Quiz updated successfully",
             "quiz": {
@@ -532,10 +651,13 @@ def update_quiz(quiz_id):
 def delete_quiz(quiz_id):
     try:
         quiz = Quiz.query.get_or_404(quiz_id)
+        chapter_id = quiz.chapter_id
         
         db.session.delete(quiz)
         db.session.commit()
         
+        refresh_catalog(chapter_id=chapter_id)
+        
         return jsonify({"msg": "Quiz deleted successfully"}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -546,22 +668,19 @@ def delete_quiz(quiz_id):
 # Question Management
 @admin_bp.route('/quizzes/<int:quiz_id>/questions', methods=['GET'])
 @admin_required
+@conditional(_questions_version)
 def get_questions(quiz_id):
     try:
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        question_list = [{
-            'id': question.id,
-            'question_text': question.question_text,
-            'option_1': question.option_1,
-            'option_2': question.option_2,
-            'option_3': question.option_3,
-            'option_4': question.option_4,
-            'correct_option': question.correct_option,
-            'marks': question.marks,
-            'created_at': question.created_at.isoformat()
-        } for question in questions]
+        names = QUESTION_FIELDS.requested(QUESTION_DEFAULT)
+        after, limit = page_params()
+        questions, next_cursor = keyset_page(
+            QUESTION_FIELDS.query(names).filter(Question.quiz_id == quiz_id), Question.id, after, limit
+        )
+        question_list = [QUESTION_FIELDS.serialize(question, names) for question in questions]
         
-        return jsonify(question_list), 200
+        return paginated_response(question_list, next_cursor, limit, Question, Question.quiz_id == quiz_id), 200
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": f"Error retrieving questions: {str(e)}"}), 500
 
@@ -613,6 +732,9 @@ def create_question(quiz_id):
         db.session.add(new_question)
         db.session.commit()
         
+        bump_answer_key_version(quiz_id)
+        refresh_catalog(quiz_id=quiz_id)
+        
         return jsonify({
             'id': new_question.id,
             'question_text': new_question.question_text,
@@ -635,6 +757,7 @@ def update_question(question_id):
     try:
         data = request.json
         question = Question.query.get_or_404(question_id)
+        old_key = (question.correct_option, question.marks)
         
         question.question_text = data.get('question_text', question.question_text)
         question.option_1 = data.get('option_1', question.option_1)
@@ -646,6 +769,17 @@ def update_question(question_id):
         
         db.session.commit()
         
+        bump_answer_key_version(question.quiz_id)
+        
+        # Existing attempts were scored against the old key
+        regrade_task_id = None
+        if (int(question.correct_option), int(question.marks)) != old_key:
+            try:
+                from tasks.regrade_tasks import regrade_quiz
+                regrade_task_id = regrade_quiz.delay(question.quiz_id).id
+            except Exception:
+                regrade_task_id = None
+        
         return jsonify({
             'id': question.id,
             'question_text': question.question_text,
@@ -654,7 +788,8 @@ def update_question(question_id):
             'option_3': question.option_3,
             'option_4': question.option_4,
             'correct_option': question.correct_option,
-            'marks': question.marks
+            'marks': question.marks,
+            'regrade_task_id': regrade_task_id
         }), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -667,10 +802,14 @@ def update_question(question_id):
 def delete_question(question_id):
     try:
         question = Question.query.get_or_404(question_id)
+        quiz_id = question.quiz_id
         
         db.session.delete(question)
         db.session.commit()
         
+        bump_answer_key_version(quiz_id)
+        refresh_catalog(quiz_id=quiz_id)
+        
         return jsonify({"msg": "Question deleted successfully"}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -681,6 +820,7 @@ def delete_question(question_id):
 # Dashboard Statistics
 @admin_bp.route('/dashboard', methods=['GET'])
 @admin_required
+@conditional(_dashboard_version)
 def get_dashboard_stats():
     try:
         # Get counts for dashboard stats
@@ -698,6 +838,19 @@ def get_dashboard_stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500 
 
+@admin_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """Lookup counts and hit ratios of each cache tier, across all workers"""
+    try:
+        backend = cache.cache
+        if not hasattr(backend, 'stats'):
+            return jsonify({"msg": f"{type(backend).__name__} does not track hit ratios"}), 404
+
+        return jsonify(backend.stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Debugging endpoint to check JWT token
 @admin_bp.route('/debug-token', methods=['GET'])
 @jwt_required()
@@ -804,4 +957,76 @@ def get_email_task_status(task_id):
         return jsonify({
             'status': 'error',
             'message': f'Error checking task status: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+@admin_bp.route('/quizzes/<int:quiz_id>/regrade', methods=['POST'])
+@admin_required
+def trigger_regrade(quiz_id):
+    """
+    Admin endpoint to regrade all completed attempts of a quiz
+    """
+    try:
+        Quiz.query.get_or_404(quiz_id)
+        
+        from tasks.regrade_tasks import regrade_quiz
+        
+        task = regrade_quiz.delay(quiz_id)
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Regrade task triggered successfully',
+            'task_id': task.id
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to trigger regrade: {str(e)}'
+        }), 500
+
+@admin_bp.route('/regrade-tasks/status/<task_id>', methods=['GET'])
+@admin_required
+def get_regrade_task_status(task_id):
+    """
+    Check status and progress of a regrade task
+    """
+    try:
+        from celery.result import AsyncResult
+        
+        task = AsyncResult(task_id)
+        
+        if task.state == 'PENDING':
+            response = {
+                'state': task.state,
+                'status': 'Task is waiting to be processed...'
+            }
+        elif task.state == 'PROGRESS':
+            response = {
+                'state': task.state,
+                'current': task.info.get('current', 0),
+                'total': task.info.get('total', 0),
+                'status': task.info.get('status', 'Task is in progress...')
+            }
+        elif task.state == 'SUCCESS':
+            response = {
+                'state': task.state,
+                'result': task.result
+            }
+        elif task.state == 'FAILURE':
+            response = {
+                'state': task.state,
+                'error': str(task.result),
+            }
+        else:
+            response = {
+                'state': task.state,
+                'status': str(task.info) if task.info else 'Task is in progress...'
+            }
+            
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Error checking task status: {str(e)}'
+        }), 500
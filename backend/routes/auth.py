@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, get_jwt_identity
+from utils.auth import jwt_required
 from controllers.models import User, Admin
 from controllers.extensions import db
 from datetime import datetime, timedelta
@@ -0,0 +1,83 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from utils.auth import batch_environ
+import logging
+
+logger = logging.getLogger(__name__)
+
+batch_bp = Blueprint('batch', __name__)
+
+BATCH_MAX_REQUESTS = 10
+
+
+def _resolve_path(path):
+    """Sub-request paths are relative to /api, like the frontend's base URL"""
+    if not path.startswith('/'):
+        path = f"/{path}"
+    if not path.startswith('/api/'):
+        path = f"/api{path}"
+    return path
+
+
+def _dispatch(path):
+    """
+    Run one GET sub-request inside the current app context, so it shares
+    the batch request's database session with its siblings
+
+    The batch verified the caller's token once; sub-requests get its
+    identity through the environ, and utils.auth.jwt_required trusts it
+    instead of decoding the token again.
+    """
+    environ = {'REMOTE_ADDR': request.remote_addr, **batch_environ()}
+    headers = {'Accept': 'application/json'}
+    if request.headers.get('Authorization'):
+        headers['Authorization'] = request.headers['Authorization']
+
+    with current_app.test_request_context(path, method='GET', headers=headers, environ_base=environ):
+        try:
+            response = current_app.full_dispatch_request()
+        except Exception as e:
+            logger.error(f"Error in batch sub-request {path}: {str(e)}")
+            return {'path': path, 'status': 500, 'body': {'error': str(e)}}
+
+    if response.is_json:
+        body = response.get_json(silent=True)
+    else:
+        body = response.get_data(as_text=True)
+
+    return {'path': path, 'status': response.status_code, 'body': body}
+
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch():
+    """
+    Run several GET requests in one round trip
+
+    Body: {"requests": ["/user/dashboard", {"path": "/subjects/details"}, ...]}
+    Returns each sub-request's path, status code and body, in order.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('requests')
+
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "requests must be a non-empty list"}), 400
+        if len(items) > BATCH_MAX_REQUESTS:
+            return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"}), 400
+
+        paths = []
+        for item in items:
+            path = item.get('path') if isinstance(item, dict) else item
+            if not isinstance(path, str) or not path:
+                return jsonify({"error": "Each request needs a path"}), 400
+
+            path = _resolve_path(path)
+            if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+                return jsonify({"error": "Batches cannot be nested"}), 400
+            paths.append(path)
+
+        return jsonify({'responses': [_dispatch(path) for path in paths]})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import jwt_required
 from controllers.models import User, Quiz, QuizAttempt, Subject, Chapter
 from controllers.extensions import db
 from datetime import datetime
@@ -1,47 +1,52 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, url_for
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import jwt_required
 from controllers.models import Subject, Chapter, Quiz, Question, User, QuizAttempt, QuizResponse
 from controllers.extensions import db, cache
 from datetime import datetime
-from sqlalchemy import func, distinct
-import random
+from utils.grading import grade_attempt, save_responses
+from utils.answer_keys import get_answer_key
+from utils.autosave import save_answers, get_saved_answers, merge_saved_answers
+from utils.attempt_sessions import open_attempt, get_attempt_session, release_attempt
+from utils.question_payloads import get_question_fragments, questions_response, new_shuffle_seed
+from utils.catalog import get_catalog, catalog_subjects, catalog_chapters, catalog_quizzes, catalog_quiz
+from utils.conditional import conditional, combine, tag_version, catalog_validator, scheduled_catalog_validator, catalog_key, scheduled_catalog_key
+from utils.decorators import cached
 
 quiz_bp = Blueprint('quiz', __name__)
 
+
+def _completed_attempt_version(attempt_id):
+    """
+    Validator for the results of a finished attempt owned by the caller
+
+    Results also carry question text and correct options, so any change to
+    the quiz's questions changes the tag even when the score does not.
+    """
+    session = get_attempt_session(attempt_id)
+    if not session or not session.is_owned_by(get_jwt_identity()) or session.status != 'completed':
+        return None
+    return combine(
+        (f"attempt-{session.id}-{session.score}-{session.total_marks}", None),
+        tag_version(f"quiz:{session.quiz_id}")
+    )
+
+
 @quiz_bp.route('/subjects/details', methods=['GET'])
 @jwt_required()
+@conditional(catalog_validator)
+@cached(timeout=3600, key_prefix='catalog', version=catalog_key)
 def get_subjects_with_details():
     """Get all subjects with chapter and quiz counts"""
     try:
-        subjects = db.session.query(
-            Subject.id,
-            Subject.name,
-            Subject.description,
-            Subject.created_at,
-            func.count(distinct(Chapter.id)).label('chapter_count'),
-            func.count(distinct(Quiz.id)).label('quiz_count')
-        ).outerjoin(Chapter, Subject.id == Chapter.subject_id)\
-         .outerjoin(Quiz, Chapter.id == Quiz.chapter_id)\
-         .filter(Subject.is_active == True)\
-         .group_by(Subject.id)\
-         .all()
-         
-        result = [{
-            'id': s.id,
-            'name': s.name,
-            'description': s.description,
-            'created_at': s.created_at.isoformat() if s.created_at else None,
-            'chapter_count': s.chapter_count,
-            'quiz_count': s.quiz_count
-        } for s in subjects]
-        
-        return jsonify(result)
+        return jsonify(catalog_subjects(get_catalog()))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @quiz_bp.route('/subjects/<int:subject_id>', methods=['GET'])
 @jwt_required()
+@conditional(catalog_validator)
 def get_subject(subject_id):
     """Get subject by ID"""
     try:
@@ -63,35 +68,19 @@ def get_subject(subject_id):
 
 @quiz_bp.route('/subjects/<int:subject_id>/chapters', methods=['GET'])
 @jwt_required()
+@conditional(catalog_validator)
+@cached(timeout=3600, key_prefix='catalog', version=catalog_key)
 def get_chapters_by_subject(subject_id):
     """Get all chapters for a specific subject"""
     try:
-        chapters = db.session.query(
-            Chapter.id,
-            Chapter.name,
-            Chapter.description,
-            Chapter.created_at,
-            func.count(Quiz.id).label('quiz_count')
-        ).outerjoin(Quiz, Chapter.id == Quiz.chapter_id)\
-         .filter(Chapter.subject_id == subject_id, Chapter.is_active == True)\
-         .group_by(Chapter.id)\
-         .all()
-         
-        result = [{
-            'id': c.id,
-            'name': c.name,
-            'description': c.description,
-            'created_at': c.created_at.isoformat() if c.created_at else None,
-            'quiz_count': c.quiz_count
-        } for c in chapters]
-        
-        return jsonify(result)
+        return jsonify(catalog_chapters(get_catalog(), subject_id))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @quiz_bp.route('/subjects', methods=['GET'])
 @jwt_required()
+@conditional(catalog_validator)
 def get_all_subjects():
     """Get all active subjects"""
     try:
@@ -111,6 +100,7 @@ def get_all_subjects():
 
 @quiz_bp.route('/chapters/<int:chapter_id>', methods=['GET'])
 @jwt_required()
+@conditional(catalog_validator)
 def get_chapter(chapter_id):
     """Get chapter by ID"""
     try:
@@ -133,89 +123,29 @@ def get_chapter(chapter_id):
 
 @quiz_bp.route('/chapters/<int:chapter_id>/quizzes', methods=['GET'])
 @jwt_required()
+@conditional(scheduled_catalog_validator)
+@cached(timeout=60, key_prefix='catalog', version=scheduled_catalog_key)
 def get_quizzes_by_chapter(chapter_id):
     """Get all quizzes for a specific chapter"""
     try:
-        quizzes = db.session.query(
-            Quiz.id,
-            Quiz.title,
-            Quiz.description,
-            Quiz.start_date,
-            Quiz.start_time,
-            Quiz.end_date,
-            Quiz.end_time,
-            Quiz.time_duration,
-            Quiz.passing_score,
-            Quiz.total_marks,
-            Quiz.is_locked,
-            Quiz.is_active,
-            Quiz.created_at,
-            func.count(Question.id).label('question_count')
-        ).outerjoin(Question, Quiz.id == Question.quiz_id)\
-         .filter(Quiz.chapter_id == chapter_id, Quiz.is_active == True)\
-         .group_by(Quiz.id)\
-         .all()
-         
-        result = []
-        for q in quizzes:
-            quiz_obj = Quiz.query.get(q.id)
-            
-            quiz_data = {
-                'id': q.id,
-                'title': q.title,
-                'description': q.description,
-                'start_date': q.start_date.isoformat() if q.start_date else None,
-                'start_time': q.start_time.strftime('%H:%M') if q.start_time else None,
-                'end_date': q.end_date.isoformat() if q.end_date else None,
-                'end_time': q.end_time.strftime('%H:%M') if q.end_time else None,
-                'time_duration': q.time_duration,
-                'passing_score': q.passing_score,
-                'total_marks': q.total_marks,
-                'created_at': q.created_at.isoformat() if q.created_at else None,
-                'question_count': q.question_count,
-                'is_active': q.is_active,
-                'is_locked': q.is_locked,
-                'is_available': quiz_obj.is_available() if quiz_obj else False,
-                'time_until_start': str(quiz_obj.time_until_start()) if quiz_obj and quiz_obj.time_until_start() else None,
-                'time_until_end': str(quiz_obj.time_until_end()) if quiz_obj and quiz_obj.time_until_end() else None,
-                'date_of_quiz': q.start_date.isoformat() if q.start_date else None
-            }
-            result.append(quiz_data)
-        
-        return jsonify(result)
+        return jsonify(catalog_quizzes(get_catalog(), chapter_id))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @quiz_bp.route('/quizzes/<int:quiz_id>', methods=['GET'])
 @jwt_required()
+@conditional(scheduled_catalog_validator)
+@cached(timeout=60, key_prefix='catalog', version=scheduled_catalog_key)
 def get_quiz(quiz_id):
     """Get quiz by ID with all details"""
     try:
-        quiz = Quiz.query.get_or_404(quiz_id)
+        quiz = catalog_quiz(get_catalog(), quiz_id)
         
-        if not quiz.is_active:
+        if quiz is None:
             return jsonify({"error": "Quiz not found"}), 404
         
-        return jsonify({
-            'id': quiz.id,
-            'title': quiz.title,
-            'description': quiz.description,
-            'start_date': quiz.start_date.isoformat() if quiz.start_date else None,
-            'start_time': quiz.start_time.strftime('%H:%M') if quiz.start_time else None,
-            'end_date': quiz.end_date.isoformat() if quiz.end_date else None,
-            'end_time': quiz.end_time.strftime('%H:%M') if quiz.end_time else None,
-            'time_duration': quiz.time_duration,
-            'passing_score': quiz.passing_score,
-            'total_marks': quiz.total_marks,
-            'chapter_id': quiz.chapter_id,
-            'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
-            'is_active': quiz.is_active,
-            'is_available': quiz.is_available(),
-            'is_locked': quiz.is_locked,
-            'time_until_start': str(quiz.time_until_start()) if quiz.time_until_start() else None,
-            'time_until_end': str(quiz.time_until_end()) if quiz.time_until_end() else None
-        })
+        return jsonify(quiz)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -223,10 +153,11 @@ def get_quiz(quiz_id):
 
 @quiz_bp.route('/quizzes/<int:quiz_id>/questions/count', methods=['GET'])
 @jwt_required()
+@conditional(catalog_validator)
 def get_question_count(quiz_id):
     """Get question count for a quiz"""
     try:
-        count = Question.query.filter_by(quiz_id=quiz_id).count()
+        count = db.session.query(Quiz.question_count).filter(Quiz.id == quiz_id).scalar() or 0
         return jsonify({"count": count})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -266,7 +197,9 @@ def create_attempt(quiz_id):
         new_attempt = QuizAttempt(
             user_id=user_id,
             quiz_id=quiz_id,
+            start_time=datetime.now(),
             status='in_progress',
+            shuffle_seed=new_shuffle_seed(),
             score=0,
             total_marks=quiz.total_marks
         )
@@ -274,6 +207,9 @@ def create_attempt(quiz_id):
         db.session.add(new_attempt)
         db.session.commit()
         
+        # Cache the attempt session and index its deadline
+        open_attempt(new_attempt, quiz)
+        
         # Return the ID as an integer, not a string
         return jsonify({
             'id': new_attempt.id,
@@ -293,10 +229,28 @@ def get_attempt(attempt_id):
     try:
         user_id = get_jwt_identity()
         
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized"}), 403
         
+        # Nothing but the session can change until the attempt is submitted
+        if session.status == 'in_progress':
+            return jsonify({
+                'id': session.id,
+                'user_id': session.user_id,
+                'quiz_id': session.quiz_id,
+                'status': session.status,
+                'score': session.score,
+                'total_marks': session.total_marks,
+                'score_percentage': None,
+                'time_taken': None,
+                'created_at': session.created_at
+            })
+        
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
+        
         return jsonify({
             'id': attempt.id,
             'user_id': attempt.user_id,
@@ -320,36 +274,87 @@ def get_attempt_questions(attempt_id):
         user_id = get_jwt_identity()
         
         # Find the attempt and ensure it belongs to this user
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized access to this attempt"}), 403
         
         # Only allow accessing questions if attempt is in progress
-        if attempt.status != 'in_progress':
+        if session.status != 'in_progress':
             return jsonify({"error": "Attempt is not in progress"}), 400
         
-        # Get all questions for the quiz
-        questions = Question.query.filter_by(quiz_id=attempt.quiz_id).all()
+        # Shared pre-encoded questions, cached once for every attempt
+        fragments = get_question_fragments(session.quiz_id)
         
-        if not questions:
+        if not fragments:
             return jsonify([]), 200
+        
+        # Restore answers autosaved before a reload or dropped connection
+        saved_answers = get_saved_answers(attempt_id)
+        
+        # Serve questions in the attempt's seeded order without re-serializing them
+        return questions_response(fragments, session.question_order(fragments), saved_answers)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@quiz_bp.route('/attempts/<int:attempt_id>/answers', methods=['PATCH'])
+@jwt_required()
+def autosave_answers(attempt_id):
+    """Autosave answers for an in-progress attempt without submitting it"""
+    try:
+        user_id = get_jwt_identity()
+        
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
+            return jsonify({"error": "Unauthorized"}), 403
+        
+        if session.status != 'in_progress':
+            return jsonify({"error": "Attempt is not in progress"}), 400
+        
+        # Accept a single answer or a list of answers
+        data = request.json
+        if not data:
+            return jsonify({"error": "Missing answers"}), 400
+        answers = data.get('answers', [data] if 'question_id' in data else [])
+        
+        answer_key = get_answer_key(session.quiz_id)
+        
+        saved = {}
+        for answer in answers:
+            try:
+                question_id = int(answer.get('question_id'))
+                selected_option = int(answer.get('selected_option') or 0)
+            except (ValueError, TypeError):
+                return jsonify({"error": "Invalid answer format"}), 400
+            
+            if question_id not in answer_key:
+                return jsonify({"error": f"Question {question_id} is not part of this quiz"}), 400
+            if selected_option < 0 or selected_option > 4:
+                return jsonify({"error": "Selected option must be between 0 and 4"}), 400
             
-        # Shuffle questions for randomization
-        random.shuffle(questions)
+            saved[question_id] = selected_option
         
-        result = [{
-            'id': q.id,
-            'question_text': q.question_text,
-            'option_1': q.option_1,
-            'option_2': q.option_2,
-            'option_3': q.option_3,
-            'option_4': q.option_4,
-            'marks': q.marks
-        } for q in questions]
+        if not saved:
+            return jsonify({"error": "Missing answers"}), 400
         
-        return jsonify(result)
+        if not save_answers(attempt_id, saved, session.time_duration):
+            # Redis is unavailable, write straight through to the database
+            save_responses(attempt_id, {
+                qid: {'selected_option': opt} for qid, opt in saved.items()
+            })
+            db.session.commit()
+        
+        return jsonify({
+            'id': session.id,
+            'saved': len(saved)
+        })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 @quiz_bp.route('/attempts/<int:attempt_id>/submit', methods=['PUT'])
@@ -359,13 +364,16 @@ def submit_attempt(attempt_id):
     try:
         user_id = get_jwt_identity()
         
-        # Find the attempt and verify ownership
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        # Verify ownership from the session before touching the database
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized"}), 403
         
         # Check if attempt is still in progress
-        if attempt.status != 'in_progress':
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
+        if session.status != 'in_progress' or attempt.status != 'in_progress':
             return jsonify({"error": "Attempt already submitted"}), 400
         
         # Get quiz details
@@ -376,56 +384,28 @@ def submit_attempt(attempt_id):
         if not data or 'answers' not in data:
             return jsonify({"error": "Missing answers"}), 400
             
-        answers = data['answers']
+        answers = merge_saved_answers(attempt_id, data['answers'])
         time_taken = data.get('time_taken', quiz.time_duration)
         
-        # Process each answer and calculate score
-        total_score = 0
-        
-        for answer in answers:
-            question_id = answer.get('question_id')
-            selected_option = answer.get('selected_option', 0)
+        # Async mode: persist the answers and let the grading queue score them
+        if request.args.get('mode') == 'async' or current_app.config.get('ASYNC_SUBMIT'):
+            from tasks.grading_tasks import queue_attempt_grading
             
-            if not question_id:
-                continue
-                
-            # Get question
-            question = Question.query.get(question_id)
-            if not question or question.quiz_id != quiz.id:
-                continue
-                
-            # Check if answer is correct
-            is_correct = (selected_option == question.correct_option)
-            score = question.marks if is_correct else 0
-            total_score += score
-
-            # Create or update response
-            response = QuizResponse.query.filter_by(
-                attempt_id=attempt_id,
-                question_id=question_id
-            ).first()
-            
-            if not response:
-                response = QuizResponse(
-                    attempt_id=attempt_id,
-                    question_id=question_id
-                )
-                db.session.add(response)
+            task_id = queue_attempt_grading(attempt, answers, time_taken)
+            release_attempt(attempt_id)
             
-            # Ensure selected_option is never null
-            response.selected_option = selected_option if selected_option > 0 else 0
-            response.is_correct = is_correct
-            response.score = score
-        
-        # Update attempt
-        attempt.status = 'completed'
-        attempt.score = total_score
-        attempt.score_percentage = round((total_score / attempt.total_marks) * 100) if attempt.total_marks > 0 else 0
-        attempt.time_taken = time_taken
-        attempt.end_time = datetime.now()
-        attempt.is_passed = attempt.score_percentage >= quiz.passing_score
+            return jsonify({
+                'id': attempt.id,
+                'status': attempt.status,
+                'task_id': task_id,
+                'status_url': url_for('.get_attempt_status', attempt_id=attempt.id)
+            }), 202
+        
+        # Grade all answers against the quiz answer key in one pass
+        grade_attempt(attempt, quiz, answers, time_taken, total_marks=attempt.total_marks)
         
         db.session.commit()
+        release_attempt(attempt_id)
         
         return jsonify({
             'id': attempt.id,
@@ -440,20 +420,62 @@ def submit_attempt(attempt_id):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@quiz_bp.route('/attempts/<int:attempt_id>/status', methods=['GET'])
+@jwt_required()
+def get_attempt_status(attempt_id):
+    """Get grading status of a submitted attempt"""
+    try:
+        user_id = get_jwt_identity()
+        
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
+            return jsonify({"error": "Unauthorized"}), 403
+        
+        # Scores only exist once grading has finished
+        if session.status != 'completed':
+            return jsonify({
+                'id': session.id,
+                'status': session.status
+            })
+        
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
+        
+        result = {
+            'id': attempt.id,
+            'status': attempt.status
+        }
+        
+        if attempt.status == 'completed':
+            result.update({
+                'score': attempt.score,
+                'total_marks': attempt.total_marks,
+                'score_percentage': attempt.score_percentage,
+                'is_passed': attempt.is_passed
+            })
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @quiz_bp.route('/attempts/<int:attempt_id>/results', methods=['GET'])
 @jwt_required()
+@conditional(_completed_attempt_version)
 def get_attempt_results(attempt_id):
     """Get detailed results for a completed attempt"""
     try:
         user_id = get_jwt_identity()
         
-        # Find the attempt and verify ownership
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        # Verify ownership; the session also carries the quiz details
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized"}), 403
         
-        # Get quiz details
-        quiz = Quiz.query.get_or_404(attempt.quiz_id)
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
         
         # Get all responses with question details
         responses = db.session.query(
@@ -482,11 +504,11 @@ def get_attempt_results(attempt_id):
         result = {
             'attempt_id': attempt.id,
             'quiz_id': attempt.quiz_id,
-            'quiz_title': quiz.title,
+            'quiz_title': session.quiz_title,
             'score': attempt.score,
             'total_marks': attempt.total_marks,
             'score_percentage': attempt.score_percentage,
-            'passing_score': quiz.passing_score,
+            'passing_score': session.passing_score,
             'time_taken': attempt.time_taken,
             'status': attempt.status,
             'is_passed': attempt.is_passed,
@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, url_for
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import jwt_required
 from controllers.models import Quiz, Question, User, QuizAttempt, QuizResponse
 from controllers.extensions import db
 from sqlalchemy import exc
 from datetime import datetime
+from utils.grading import grade_attempt, precreate_responses
+from utils.autosave import get_saved_answers, merge_saved_answers
+from utils.attempt_sessions import open_attempt, get_attempt_session, release_attempt
+from utils.question_payloads import get_question_fragments, questions_response, new_shuffle_seed
 
 attempts_bp = Blueprint('attempts', __name__)
 
@@ -35,25 +40,21 @@ def start_attempt(quiz_id):
             user_id=user_id,
             quiz_id=quiz_id,
             start_time=datetime.now(),
-            status='in_progress'
+            status='in_progress',
+            shuffle_seed=new_shuffle_seed()
         )
         
         db.session.add(new_attempt)
         db.session.flush()  
         
-        # Get questions for this quiz
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        
-        # Create response objects for each question
-        for question in questions:
-            response = QuizResponse(
-                attempt_id=new_attempt.id,
-                question_id=question.id
-            )
-            db.session.add(response)
+        # Create an empty response for each question in one statement
+        precreate_responses(new_attempt.id, quiz_id)
         
         db.session.commit()
         
+        # Cache the attempt session and index its deadline
+        open_attempt(new_attempt, quiz)
+        
         return jsonify({
             "id": new_attempt.id,
             "message": "Quiz attempt started successfully"
@@ -73,18 +74,35 @@ def get_attempt(attempt_id):
     try:
         user_id = get_jwt_identity()
         
-        # Get the attempt and ensure it belongs to this user
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        # Get the attempt session and ensure it belongs to this user
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized access to this attempt"}), 403
         
-        # Get quiz details
-        quiz = Quiz.query.get(attempt.quiz_id)
+        # Nothing but the session can change until the attempt is submitted
+        if session.status == 'in_progress':
+            return jsonify({
+                "id": session.id,
+                "quiz_id": session.quiz_id,
+                "quiz_title": session.quiz_title,
+                "status": session.status,
+                "start_time": session.start_time,
+                "end_time": None,
+                "time_taken": None,
+                "score": session.score,
+                "total_marks": session.total_marks,
+                "score_percentage": None,
+                "is_passed": None
+            })
+        
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
         
         result = {
             "id": attempt.id,
             "quiz_id": attempt.quiz_id,
-            "quiz_title": quiz.title if quiz else "Unknown Quiz",
+            "quiz_title": session.quiz_title,
             "status": attempt.status,
             "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
             "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
@@ -108,39 +126,34 @@ def get_attempt_questions(attempt_id):
     try:
         user_id = get_jwt_identity()
         
-        # Get the attempt and ensure it belongs to this user
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        # Get the attempt session and ensure it belongs to this user
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized access to this attempt"}), 403
         
-        # Get questions from responses
-        questions = db.session.query(
-            Question.id,
-            Question.question_text,
-            Question.option_1,
-            Question.option_2,
-            Question.option_3,
-            Question.option_4,
-            Question.marks,
+        # The attempt's questions are the responses created when it started
+        responses = dict(db.session.query(
+            QuizResponse.question_id,
             QuizResponse.selected_option
-        ).join(
-            QuizResponse, Question.id == QuizResponse.question_id
         ).filter(
             QuizResponse.attempt_id == attempt_id
-        ).all()
+        ).all())
         
-        result = [{
-            "id": q.id,
-            "question_text": q.question_text,
-            "option_1": q.option_1,
-            "option_2": q.option_2,
-            "option_3": q.option_3,
-            "option_4": q.option_4,
-            "marks": q.marks,
-            "selected_option": q.selected_option
-        } for q in questions]
+        # Shared pre-encoded questions, cached once for every attempt
+        fragments = get_question_fragments(session.quiz_id)
         
-        return jsonify(result)
+        # Answers live in the autosave hash until the attempt is submitted
+        if session.status == 'in_progress':
+            selected_options = {**responses, **get_saved_answers(attempt_id)}
+        else:
+            selected_options = responses
+        
+        # Order over the attempt's own questions, skipping any deleted since it started
+        order = [qid for qid in session.question_order(responses) if qid in fragments]
+        
+        return questions_response(fragments, order, selected_options)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -157,13 +170,16 @@ def submit_attempt(attempt_id):
         if not data or 'answers' not in data:
             return jsonify({"error": "Missing answer data"}), 400
         
-        # Get the attempt and ensure it belongs to this user
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        # Ensure the attempt belongs to this user before touching the database
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized access to this attempt"}), 403
         
-        # Check if attempt is already completed
-        if attempt.status == 'completed':
+        # Check if attempt is already completed or queued for grading
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
+        if session.status in ('completed', 'grading') or attempt.status in ('completed', 'grading'):
             return jsonify({"error": "This attempt has already been submitted"}), 400
         
         # Get the quiz
@@ -171,53 +187,28 @@ def submit_attempt(attempt_id):
         if not quiz:
             return jsonify({"error": "Associated quiz not found"}), 404
         
-        # Process answers and calculate score
-        total_score = 0
-        total_possible = 0
+        answers = merge_saved_answers(attempt_id, data['answers'])
         
-        for answer_data in data['answers']:
-            question_id = answer_data.get('question_id')
-            selected_option = answer_data.get('selected_option', 0)
-            
-            # Get the question
-            question = Question.query.get(question_id)
-            if not question:
-                continue
-                
-            # Get the response
-            response = QuizResponse.query.filter_by(
-                attempt_id=attempt_id,
-                question_id=question_id
-            ).first()
+        # Async mode: persist the answers and let the grading queue score them
+        if request.args.get('mode') == 'async' or current_app.config.get('ASYNC_SUBMIT'):
+            from tasks.grading_tasks import queue_attempt_grading
             
-            if not response:
-                continue
-                
-            # Update the response
-            response.selected_option = selected_option
+            task_id = queue_attempt_grading(attempt, answers, data.get('time_taken', 0), use_quiz_total=False)
+            release_attempt(attempt_id)
             
-            # Check if answer is correct
-            is_correct = selected_option == question.correct_option
-            response.is_correct = is_correct
-            
-            # Calculate marks and update the score field (not marks_obtained)
-            score = question.marks if is_correct else 0
-            response.score = score
-            
-            # Add to total score
-            total_score += score
-            total_possible += question.marks
-        
-        # Update the attempt
-        attempt.end_time = datetime.now()
-        attempt.status = 'completed'
-        attempt.score = total_score
-        attempt.total_marks = total_possible
-        attempt.score_percentage = round((total_score / total_possible) * 100) if total_possible > 0 else 0
-        attempt.is_passed = attempt.score_percentage >= quiz.passing_score
-        attempt.time_taken = data.get('time_taken', 0)
+            return jsonify({
+                "id": attempt.id,
+                "status": attempt.status,
+                "task_id": task_id,
+                "status_url": url_for('.get_attempt_status', attempt_id=attempt.id),
+                "message": "Quiz submitted for grading"
+            }), 202
+        
+        # Grade all answers against the quiz answer key in one pass
+        grade_attempt(attempt, quiz, answers, data.get('time_taken', 0))
         
         db.session.commit()
+        release_attempt(attempt_id)
         
         return jsonify({
             "id": attempt.id,
@@ -235,6 +226,48 @@ def submit_attempt(attempt_id):
         return jsonify({"error": str(e)}), 500
 
 
+@attempts_bp.route('/<int:attempt_id>/status', methods=['GET'])
+@jwt_required()
+def get_attempt_status(attempt_id):
+    """Get grading status of a submitted quiz attempt"""
+    try:
+        user_id = get_jwt_identity()
+        
+        # Get the attempt session and ensure it belongs to this user
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
+            return jsonify({"error": "Unauthorized access to this attempt"}), 403
+        
+        # Scores only exist once grading has finished
+        if session.status != 'completed':
+            return jsonify({
+                "id": session.id,
+                "status": session.status
+            })
+        
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
+        
+        result = {
+            "id": attempt.id,
+            "status": attempt.status
+        }
+        
+        if attempt.status == 'completed':
+            result.update({
+                "score": attempt.score,
+                "total_marks": attempt.total_marks,
+                "score_percentage": attempt.score_percentage,
+                "is_passed": attempt.is_passed
+            })
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @attempts_bp.route('/<int:attempt_id>/results', methods=['GET'])
 @jwt_required()
 def get_attempt_results(attempt_id):
@@ -242,17 +275,18 @@ def get_attempt_results(attempt_id):
     try:
         user_id = get_jwt_identity()
         
-        # Get the attempt and ensure it belongs to this user
-        attempt = QuizAttempt.query.get_or_404(attempt_id)
-        if attempt.user_id != int(user_id):
+        # Get the attempt session and ensure it belongs to this user
+        session = get_attempt_session(attempt_id)
+        if not session:
+            return jsonify({"error": "Attempt not found"}), 404
+        if not session.is_owned_by(user_id):
             return jsonify({"error": "Unauthorized access to this attempt"}), 403
         
         # Check if attempt is completed
-        if attempt.status != 'completed':
+        if session.status != 'completed':
             return jsonify({"error": "Results are only available for completed attempts"}), 400
         
-        # Get quiz details
-        quiz = Quiz.query.get(attempt.quiz_id)
+        attempt = QuizAttempt.query.get_or_404(attempt_id)
         
         # Get question responses with details
         responses = db.session.query(
@@ -289,10 +323,10 @@ def get_attempt_results(attempt_id):
         result = {
             "attempt_id": attempt.id,
             "quiz_id": attempt.quiz_id,
-            "quiz_title": quiz.title if quiz else "Unknown Quiz",
-            "quiz_passing_score": quiz.passing_score if quiz else 0,
-            "date_of_quiz": quiz.date_of_quiz.isoformat() if quiz and quiz.date_of_quiz else None,
-            "time_duration": quiz.time_duration if quiz else 0,
+            "quiz_title": session.quiz_title,
+            "quiz_passing_score": session.passing_score,
+            "date_of_quiz": session.date_of_quiz,
+            "time_duration": session.time_duration,
             "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
             "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
             "time_taken": attempt.time_taken,
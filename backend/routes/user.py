@@ -1,17 +1,54 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import jwt_required
 from sqlalchemy.sql import func
 from controllers.models import Subject, Chapter, Quiz, Question, User, QuizAttempt, QuizResponse
 from controllers.extensions import db, cache
 from datetime import datetime
 from sqlalchemy.orm.exc import NoResultFound
 from utils.decorators import cached, rate_limit
+from utils.catalog import get_catalog, catalog_available_quizzes
+from utils.conditional import conditional, collection_version, catalog_version, scheduled_catalog_validator, scheduled_catalog_key, combine
 
 user_bp = Blueprint('user', __name__)
 
+
+def _attempts_version(user_id, *criteria):
+    """Validator for a user's attempts; completions and regrades change it too"""
+    return combine(
+        (f"user-{user_id}", None),
+        collection_version(
+            QuizAttempt,
+            QuizAttempt.user_id == user_id,
+            *criteria,
+            extra=(func.count(QuizAttempt.end_time), func.sum(QuizAttempt.score))
+        )
+    )
+
+
+def _dashboard_version(**kwargs):
+    return combine(_attempts_version(get_jwt_identity()), catalog_version())
+
+
+def _attempt_history_version(**kwargs):
+    # Listings carry quiz, chapter and subject names from the catalog
+    return combine(_attempts_version(get_jwt_identity()), catalog_version())
+
+
+def _quiz_attempts_version(quiz_id):
+    return _attempts_version(get_jwt_identity(), QuizAttempt.quiz_id == quiz_id)
+
+
+def _user_version(user_id):
+    if int(get_jwt_identity()) != user_id:
+        return None
+    return collection_version(User, User.id == user_id)
+
+
 @user_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
-@cached(timeout=60, user_specific=True, key_prefix='user_dashboard')
+@conditional(_dashboard_version)
+@cached(timeout=3600, user_specific=True, key_prefix='user_dashboard', tags=['user:{user_id}', 'quizzes'])
 @rate_limit(limit=30, per=60, by="user")
 def user_dashboard():
     """Get stats for user dashboard with caching"""
@@ -48,68 +85,13 @@ def user_dashboard():
 
 @user_bp.route('/quizzes/available', methods=['GET'])
 @jwt_required()
+@conditional(scheduled_catalog_validator)
+@cached(timeout=60, key_prefix='catalog', version=scheduled_catalog_key)
 def get_available_quizzes():
     """Get list of available quizzes for the user with scheduling checks"""
     try:
-        try:
-            cached_data = cache.get('available_quizzes')
-            if cached_data:
-                return jsonify(cached_data)
-        except Exception as cache_error:
-            print(f"Cache error (continuing without cache): {str(cache_error)}")
-
-        from datetime import datetime
-        now = datetime.now()
-        
-        quizzes = db.session.query(
-            Quiz.id, 
-            Quiz.title, 
-            Quiz.description, 
-            Quiz.start_date,
-            Quiz.start_time,
-            Quiz.end_date,
-            Quiz.end_time,
-            Quiz.time_duration,
-            Quiz.is_locked,
-            Quiz.auto_lock_after_expiry,
-            Chapter.name.label('chapter_name'),
-            Subject.name.label('subject_name')
-        ).join(Chapter, Quiz.chapter_id == Chapter.id)\
-         .join(Subject, Chapter.subject_id == Subject.id)\
-         .filter(Quiz.is_active == True)\
-         .order_by(Quiz.start_date.desc(), Quiz.start_time.desc())\
-         .all()
-         
-        result = []
-        for q in quizzes:
-            quiz_obj = Quiz.query.get(q.id)
-            
-            if quiz_obj and quiz_obj.is_available():
-                quiz_data = {
-                    'id': q.id,
-                    'title': q.title,
-                    'description': q.description,
-                    'start_date': q.start_date.isoformat() if q.start_date else None,
-                    'start_time': q.start_time.strftime('%H:%M') if q.start_time else None,
-                    'end_date': q.end_date.isoformat() if q.end_date else None,
-                    'end_time': q.end_time.strftime('%H:%M') if q.end_time else None,
-                    'time_duration': q.time_duration,
-                    'chapter_name': q.chapter_name,
-                    'subject_name': q.subject_name,
-                    'is_available': True, 
-                    'is_locked': q.is_locked,
-                    'time_until_start': None,
-                    'time_until_end': str(quiz_obj.time_until_end()) if quiz_obj and quiz_obj.time_until_end() else None,
-                    'date_of_quiz': q.start_date.isoformat() if q.start_date else datetime.now().date().isoformat()
-                }
-                result.append(quiz_data)
-        
-        try:
-            cache.set('available_quizzes', result, timeout=60) 
-        except Exception as cache_error:
-            print(f"Failed to store in cache: {str(cache_error)}")
-            
-        return jsonify(result)
+        # Availability is evaluated per request against the catalog snapshot's schedule
+        return jsonify(catalog_available_quizzes(get_catalog()))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -117,6 +99,7 @@ def get_available_quizzes():
 
 @user_bp.route('/attempts/recent', methods=['GET'])
 @jwt_required()
+@conditional(_attempt_history_version)
 def get_recent_attempts():
     """Get recent quiz attempts by the user"""
     try:
@@ -160,6 +143,7 @@ def get_recent_attempts():
 
 @user_bp.route('/attempts/by-quiz/<int:quiz_id>', methods=['GET'])
 @jwt_required()
+@conditional(_quiz_attempts_version)
 def get_attempts_by_quiz(quiz_id):
     """Get all attempts for a specific quiz by the user"""
     try:
@@ -194,6 +178,7 @@ def get_attempts_by_quiz(quiz_id):
 
 @user_bp.route('/attempts', methods=['GET'])
 @jwt_required()
+@conditional(_attempt_history_version)
 def get_all_attempts():
     """Get all quiz attempts by the user"""
     try:
@@ -237,6 +222,7 @@ def get_all_attempts():
     
 @user_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
+@conditional(_user_version)
 def get_user(user_id):
     """Get user details"""
     try:
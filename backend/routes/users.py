@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
+from utils.auth import jwt_required
 from controllers.models import User
 from sqlalchemy.orm.exc import NoResultFound
 
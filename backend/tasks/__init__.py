@@ -1,2 +1,5 @@
 from . import reminder_tasks
-from . import export_tasks
\ No newline at end of file
+from . import export_tasks
+from . import regrade_tasks
+from . import grading_tasks
+from . import quiz_tasks
\ No newline at end of file
@@ -0,0 +1,296 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from celery import shared_task
+from controllers.models import Quiz, QuizAttempt
+from controllers.extensions import db
+from utils.grading import grade_attempt, full_marks
+from utils.answer_keys import get_answer_key
+
+logger = logging.getLogger(__name__)
+
+
+def _full_total(attempt, answer_key):
+    """
+    Marks an attempt is graded out of: the total fixed when it started, or
+    every question in the answer key for attempts started without one
+    """
+    return attempt.total_marks or full_marks(answer_key)
+
+
+def grade_pending_attempt(attempt_id, use_quiz_total=True):
+    """
+    Grade an attempt from the answers persisted by an async submit
+    This is a synchronous version that can work without Celery
+    """
+    attempt = QuizAttempt.query.get(attempt_id)
+    if not attempt:
+        raise Exception(f"Attempt with ID {attempt_id} not found")
+
+    if attempt.status != 'grading':
+        return {
+            'status': 'SKIPPED',
+            'message': f'Attempt {attempt_id} is {attempt.status}, nothing to grade',
+            'attempt_id': attempt_id
+        }
+
+    quiz = Quiz.query.get(attempt.quiz_id)
+    if not quiz:
+        raise Exception(f"Quiz with ID {attempt.quiz_id} not found")
+
+    answer_key = get_answer_key(quiz.id)
+    answers = json.loads(attempt.submitted_answers or '[]')
+    grade_attempt(
+        attempt, quiz, answers, attempt.time_taken,
+        total_marks=_full_total(attempt, answer_key) if use_quiz_total else None,
+        answer_key=answer_key
+    )
+    attempt.submitted_answers = None
+    db.session.commit()
+
+    from utils.attempt_sessions import release_attempt
+    release_attempt(attempt.id)
+
+    return {
+        'status': 'SUCCESS',
+        'attempt_id': attempt.id,
+        'score': attempt.score,
+        'total_marks': attempt.total_marks,
+        'score_percentage': attempt.score_percentage,
+        'is_passed': attempt.is_passed
+    }
+
+
+def queue_attempt_grading(attempt, answers, time_taken, use_quiz_total=True):
+    """
+    Persist the raw answers of a submit and hand grading to the grading queue
+
+    Grades inline when the task cannot be queued, so a submit is never lost.
+    If inline grading fails too, the attempt is put back in progress before
+    the error is raised, so the client can submit again.
+    Returns the Celery task id, or None when graded inline.
+    """
+    attempt_id = attempt.id
+    attempt.submitted_answers = json.dumps(answers)
+    attempt.status = 'grading'
+    attempt.time_taken = time_taken
+    attempt.end_time = datetime.now()
+    db.session.commit()
+
+    try:
+        return grade_submitted_attempt.delay(attempt_id, use_quiz_total).id
+    except Exception as e:
+        logger.error(f"Could not queue grading for attempt {attempt_id}, grading inline: {str(e)}")
+
+    try:
+        grade_pending_attempt(attempt_id, use_quiz_total)
+    except Exception:
+        db.session.rollback()
+        _reopen_attempt(attempt_id)
+        raise
+    return None
+
+
+def _reopen_attempt(attempt_id):
+    """Undo the 'grading' status of a submit whose inline grading failed"""
+    try:
+        QuizAttempt.query.filter_by(id=attempt_id, status='grading').update({
+            'status': 'in_progress',
+            'submitted_answers': None,
+            'end_time': None
+        }, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Could not reopen attempt {attempt_id} after failed grading: {str(e)}")
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=5)
+def grade_submitted_attempt(self, attempt_id, use_quiz_total=True):
+    """
+    Grade an async submit; routed to the dedicated 'grading' queue
+
+    An attempt whose retries run out stays in 'grading' with its answers
+    persisted, and is graded by the expire_overdue_attempts scan once it
+    has been stalled for GRADING_TIMEOUT_SECONDS.
+    """
+    try:
+        return grade_pending_attempt(attempt_id, use_quiz_total)
+    except Exception as e:
+        db.session.rollback()
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Giving up grading attempt {attempt_id}, left to the stalled grading scan: {str(e)}")
+            raise
+        logger.error(f"Error grading attempt {attempt_id}: {str(e)}")
+        raise self.retry(exc=e)
+
+
+# Submits still in flight at the deadline get this long before the sweeper closes the attempt
+EXPIRY_GRACE_SECONDS = 60
+EXPIRY_BATCH_SIZE = 500
+
+# Attempts still 'grading' this long after submit lost their task and are graded by the scan
+GRADING_TIMEOUT_SECONDS = 600
+
+
+def _scan_expired_attempts(now, limit, after=None):
+    """
+    Expired in-progress attempts found in the attempts table, by deadline
+
+    Attempts of one duration reach their deadline in start_time order, so
+    each distinct duration is read below its own start_time cutoff and the
+    pages are merged. Every row read is expired, so none can hold back the
+    rest. after is the (deadline, id) of the last attempt handled; returns
+    up to limit (deadline, id) pairs past it.
+    """
+    from sqlalchemy import and_, or_
+    from utils.deadlines import attempt_deadline
+
+    expired = []
+    for (duration,) in db.session.query(Quiz.time_duration).distinct().all():
+        length = timedelta(minutes=duration)
+
+        query = db.session.query(
+            QuizAttempt.id,
+            QuizAttempt.start_time
+        ).join(Quiz, QuizAttempt.quiz_id == Quiz.id)\
+         .filter(
+            QuizAttempt.status == 'in_progress',
+            Quiz.time_duration == duration,
+            QuizAttempt.start_time <= now - length
+        )
+
+        if after is not None:
+            start = after[0] - length
+            query = query.filter(or_(
+                QuizAttempt.start_time > start,
+                and_(QuizAttempt.start_time == start, QuizAttempt.id > after[1])
+            ))
+
+        rows = query.order_by(QuizAttempt.start_time, QuizAttempt.id).limit(limit).all()
+        expired.extend((attempt_deadline(r.start_time, duration), r.id) for r in rows)
+
+    return sorted(expired)[:limit]
+
+
+def _find_expired_attempts(now, limit, scan=False, after=None):
+    """
+    Expired in-progress attempts from the deadline index, or from a table
+    scan when scan is set or Redis is unavailable
+
+    Returns (attempts, attempt_ids, after), after being the scan cursor to
+    pass to the next call.
+    """
+    from utils.deadlines import get_expired_attempt_ids
+
+    attempt_ids = None if scan else get_expired_attempt_ids(now, limit)
+    if attempt_ids is None:
+        expired = _scan_expired_attempts(now, limit, after)
+        attempt_ids = [attempt_id for _, attempt_id in expired]
+        if expired:
+            after = expired[-1]
+
+    if not attempt_ids:
+        return [], [], after
+
+    return QuizAttempt.query.filter(QuizAttempt.id.in_(attempt_ids)).all(), attempt_ids, after
+
+
+def _grade_stalled_attempts(batch_size):
+    """
+    Grade attempts left in 'grading' for GRADING_TIMEOUT_SECONDS, whose
+    task was lost or ran out of retries, from their persisted answers
+    """
+    cutoff = datetime.now() - timedelta(seconds=GRADING_TIMEOUT_SECONDS)
+    graded = 0
+    last_id = 0
+
+    while True:
+        attempt_ids = [r.id for r in db.session.query(QuizAttempt.id).filter(
+            QuizAttempt.status == 'grading',
+            QuizAttempt.end_time <= cutoff,
+            QuizAttempt.id > last_id
+        ).order_by(QuizAttempt.id).limit(batch_size).all()]
+
+        for attempt_id in attempt_ids:
+            try:
+                if grade_pending_attempt(attempt_id)['status'] == 'SUCCESS':
+                    graded += 1
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error grading stalled attempt {attempt_id}: {str(e)}")
+
+        if len(attempt_ids) < batch_size:
+            break
+        last_id = attempt_ids[-1]
+
+    return graded
+
+
+@shared_task
+def expire_overdue_attempts(batch_size=EXPIRY_BATCH_SIZE, scan=False):
+    """
+    Auto-submit in-progress attempts whose time has run out.
+    Autosaved answers are graded through the set-based grading path and
+    each batch is committed together.
+
+    Set scan to find them in the attempts table instead of the deadline
+    index, and to grade attempts stuck in 'grading'; run that way
+    periodically as a backstop for attempts that never made it into the
+    index or whose grading task was lost.
+    """
+    from utils.autosave import merge_saved_answers
+    from utils.deadlines import remove_deadlines
+    from utils.attempt_sessions import release_attempt
+
+    now = datetime.now() - timedelta(seconds=EXPIRY_GRACE_SECONDS)
+    expired_total = 0
+    after = None
+
+    while True:
+        attempts, attempt_ids, after = _find_expired_attempts(now, batch_size, scan=scan, after=after)
+        if not attempt_ids:
+            break
+
+        quizzes = {q.id: q for q in Quiz.query.filter(
+            Quiz.id.in_({a.quiz_id for a in attempts})
+        ).all()}
+
+        answer_keys = {quiz_id: get_answer_key(quiz_id) for quiz_id in quizzes}
+
+        closed = []
+        for attempt in attempts:
+            quiz = quizzes.get(attempt.quiz_id)
+            if attempt.status != 'in_progress' or not quiz:
+                continue
+
+            # Unanswered questions count against an auto-submitted attempt
+            answer_key = answer_keys[quiz.id]
+            answers = merge_saved_answers(attempt.id, [])
+            grade_attempt(
+                attempt, quiz, answers, quiz.time_duration,
+                total_marks=_full_total(attempt, answer_key),
+                answer_key=answer_key
+            )
+            closed.append(attempt.id)
+
+        db.session.commit()
+
+        for attempt_id in closed:
+            release_attempt(attempt_id)
+        remove_deadlines(attempt_ids)
+
+        expired_total += len(closed)
+        if len(attempt_ids) < batch_size:
+            break
+
+    stalled_total = _grade_stalled_attempts(batch_size) if scan else 0
+
+    logger.info(f"Auto-submitted {expired_total} expired attempts, graded {stalled_total} stalled submits")
+
+    return {
+        'status': 'success',
+        'expired_attempts': expired_total,
+        'stalled_attempts': stalled_total,
+        'timestamp': datetime.now().isoformat()
+    }
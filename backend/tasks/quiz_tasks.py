@@ -0,0 +1,109 @@
+import logging
+from datetime import datetime, timedelta
+from celery import shared_task
+from sqlalchemy import update
+from controllers.models import Quiz
+from controllers.extensions import db
+from utils.catalog import build_catalog, get_catalog, refresh_catalog
+from utils.answer_keys import get_answer_key
+from utils.question_payloads import get_question_fragments
+from utils.cache_tags import invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+WARMUP_LOOKAHEAD_MINUTES = 10
+
+# Beat interval of the warm-up job; quizzes that opened since the last run are warmed too
+WARMUP_INTERVAL_SECONDS = 60
+
+
+@shared_task
+def lock_expired_quizzes():
+    """
+    Lock every quiz past its end time that has auto_lock_after_expiry set.
+    Runs as one UPDATE so is_locked stays an authoritative, indexable flag.
+    Where the database supports UPDATE ... RETURNING that statement also
+    yields the ids, so the quizzes locked are exactly those invalidated.
+    """
+    now = datetime.now()
+
+    expired = (
+        Quiz.auto_lock_after_expiry == True,
+        Quiz.is_locked == False,
+        Quiz.end_at.isnot(None),
+        Quiz.end_at < now
+    )
+    values = {'is_locked': True, 'updated_at': db.func.now()}
+
+    if db.engine.dialect.update_returning:
+        expired_ids = list(db.session.execute(
+            update(Quiz).where(*expired).values(**values).returning(Quiz.id),
+            execution_options={'synchronize_session': False}
+        ).scalars())
+    else:
+        expired_ids = [qid for (qid,) in db.session.query(Quiz.id).filter(*expired).all()]
+        if expired_ids:
+            # Quizzes locked in between are skipped here but still invalidated below
+            Quiz.query.filter(Quiz.id.in_(expired_ids), *expired).update(
+                values,
+                synchronize_session=False
+            )
+
+    if expired_ids:
+        db.session.commit()
+
+        # Locks can span many subjects, so rebuild the snapshot in one go
+        build_catalog()
+        invalidate_tags({f"quiz:{qid}" for qid in expired_ids} | {'quizzes'})
+
+    logger.info(f"Auto-locked {len(expired_ids)} expired quizzes")
+
+    return {
+        'status': 'success',
+        'locked_quizzes': expired_ids,
+        'timestamp': now.isoformat()
+    }
+
+
+@shared_task
+def warm_upcoming_quizzes(lookahead_minutes=WARMUP_LOOKAHEAD_MINUTES,
+                          lookbehind_seconds=WARMUP_INTERVAL_SECONDS):
+    """
+    Precompute what the opening burst of a quiz reads, for quizzes starting
+    within the next lookahead_minutes or in the last lookbehind_seconds,
+    since the previous run: the catalog snapshot behind the quiz lists and
+    quiz detail, the pre-encoded question payloads and the answer key.
+    Each is cached per content version, so re-warming is a cache read.
+    """
+    now = datetime.now()
+
+    upcoming_ids = [qid for (qid,) in db.session.query(Quiz.id).filter(
+        Quiz.is_active == True,
+        Quiz.is_locked == False,
+        Quiz.start_at.isnot(None),
+        Quiz.start_at >= now - timedelta(seconds=lookbehind_seconds),
+        Quiz.start_at <= now + timedelta(minutes=lookahead_minutes)
+    ).all()]
+
+    warmed = []
+    if upcoming_ids:
+        catalog = get_catalog()
+
+        for quiz_id in upcoming_ids:
+            try:
+                if str(quiz_id) not in catalog['quizzes']:
+                    catalog = refresh_catalog(quiz_id=quiz_id) or catalog
+
+                get_question_fragments(quiz_id)
+                get_answer_key(quiz_id)
+                warmed.append(quiz_id)
+            except Exception as e:
+                logger.error(f"Error warming cache for quiz {quiz_id}: {str(e)}")
+
+    logger.info(f"Warmed caches for {len(warmed)} upcoming quizzes")
+
+    return {
+        'status': 'success',
+        'warmed_quizzes': warmed,
+        'timestamp': now.isoformat()
+    }
@@ -0,0 +1,136 @@
+import logging
+import numpy as np
+from celery import shared_task
+from controllers.models import Quiz, QuizAttempt, QuizResponse
+from controllers.extensions import db
+from utils.answer_keys import get_answer_key
+from utils.grading import full_marks
+from utils.cache_tags import invalidate_tags
+from utils.regrading import answer_key_arrays, rescore_responses, rescore_attempts
+
+logger = logging.getLogger(__name__)
+
+# Completed attempts rescored per chunk
+REGRADE_CHUNK_SIZE = 2000
+
+
+def _regrade_chunk(quiz, key_arrays, total_marks, attempts):
+    """Rescore one chunk of completed attempts and bulk-write the changes"""
+    attempt_ids = np.array([a.id for a in attempts], dtype=np.int64)
+
+    responses = db.session.query(
+        QuizResponse.id,
+        QuizResponse.attempt_id,
+        QuizResponse.question_id,
+        QuizResponse.selected_option,
+        QuizResponse.is_correct,
+        QuizResponse.score
+    ).filter(
+        QuizResponse.attempt_id >= int(attempt_ids[0]),
+        QuizResponse.attempt_id <= int(attempt_ids[-1])
+    ).all()
+
+    if responses:
+        columns = list(zip(*responses))
+        response_ids = np.array(columns[0], dtype=np.int64)
+        response_attempts = np.array(columns[1], dtype=np.int64)
+        response_questions = np.array(columns[2], dtype=np.int64)
+        selected = np.array([s or 0 for s in columns[3]], dtype=np.int64)
+        old_correct = np.array([bool(c) for c in columns[4]], dtype=bool)
+        old_scores = np.array([s if s is not None else -1 for s in columns[5]], dtype=np.int64)
+
+        # The id range can include attempts of other quizzes
+        in_chunk = np.isin(response_attempts, attempt_ids)
+        response_ids = response_ids[in_chunk]
+        response_attempts = response_attempts[in_chunk]
+        response_questions = response_questions[in_chunk]
+        selected = selected[in_chunk]
+        old_correct = old_correct[in_chunk]
+        old_scores = old_scores[in_chunk]
+    else:
+        response_ids = response_attempts = response_questions = selected = old_scores = np.array([], dtype=np.int64)
+        old_correct = np.array([], dtype=bool)
+
+    is_correct, scores, _ = rescore_responses(key_arrays, response_questions, selected)
+
+    changed = (is_correct != old_correct) | (scores != old_scores)
+    if changed.any():
+        db.session.bulk_update_mappings(QuizResponse, [
+            {'id': rid, 'is_correct': correct, 'score': score}
+            for rid, correct, score in zip(
+                response_ids[changed].tolist(),
+                is_correct[changed].tolist(),
+                scores[changed].tolist()
+            )
+        ])
+
+    attempt_scores, totals, percentages, passed = rescore_attempts(
+        attempt_ids, response_attempts, scores, total_marks, quiz.passing_score
+    )
+
+    db.session.bulk_update_mappings(QuizAttempt, [
+        {'id': aid, 'score': score, 'total_marks': total, 'score_percentage': pct, 'is_passed': is_passed}
+        for aid, score, total, pct, is_passed in zip(
+            attempt_ids.tolist(), attempt_scores.tolist(), totals.tolist(), percentages.tolist(), passed.tolist()
+        )
+    ])
+    db.session.commit()
+
+    # Bulk updates bypass the session's change tracking
+    invalidate_tags({f"user:{a.user_id}" for a in attempts} | {f"attempt:{a.id}" for a in attempts})
+
+    return int(changed.sum())
+
+
+@shared_task(bind=True)
+def regrade_quiz(self, quiz_id):
+    """
+    Rescore every completed attempt of a quiz against its current answer key.
+    Attempts are streamed in id order in chunks of REGRADE_CHUNK_SIZE.
+    """
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        raise Exception(f"Quiz with ID {quiz_id} not found")
+
+    answer_key = get_answer_key(quiz_id)
+    key_arrays = answer_key_arrays(answer_key)
+    # Attempts only have response rows for some questions, so all share the full total
+    total_marks = full_marks(answer_key)
+
+    completed = QuizAttempt.query.filter_by(quiz_id=quiz_id, status='completed')
+    total = completed.count()
+    processed = 0
+    responses_changed = 0
+    last_id = 0
+
+    logger.info(f"Regrading {total} attempts for quiz {quiz_id}")
+
+    while True:
+        attempts = db.session.query(
+            QuizAttempt.id,
+            QuizAttempt.user_id
+        ).filter(
+            QuizAttempt.quiz_id == quiz_id,
+            QuizAttempt.status == 'completed',
+            QuizAttempt.id > last_id
+        ).order_by(QuizAttempt.id).limit(REGRADE_CHUNK_SIZE).all()
+
+        if not attempts:
+            break
+
+        responses_changed += _regrade_chunk(quiz, key_arrays, total_marks, attempts)
+        processed += len(attempts)
+        last_id = attempts[-1].id
+
+        self.update_state(
+            state='PROGRESS',
+            meta={'current': processed, 'total': total, 'status': f'Regraded {processed} of {total} attempts...'}
+        )
+
+    return {
+        'status': 'SUCCESS',
+        'message': f'Regraded {processed} attempts for quiz {quiz_id}',
+        'quiz_id': quiz_id,
+        'total_attempts': processed,
+        'responses_changed': responses_changed
+    }
@@ -0,0 +1,48 @@
+import numpy as np
+from utils.grading import full_marks
+from utils.regrading import answer_key_arrays, rescore_responses, rescore_attempts
+
+
+def test_raising_marks_keeps_percentage_within_100():
+    # Two one-mark questions, later re-weighted to five marks each
+    new_answer_key = {1: (2, 5), 2: (3, 5)}
+    new_key = answer_key_arrays(new_answer_key)
+
+    attempt_ids = np.array([10, 11], dtype=np.int64)
+    response_attempts = np.array([10, 10, 11, 11], dtype=np.int64)
+    response_questions = np.array([1, 2, 1, 2], dtype=np.int64)
+    selected = np.array([2, 3, 2, 1], dtype=np.int64)
+
+    _, scores, _ = rescore_responses(new_key, response_questions, selected)
+    attempt_scores, totals, percentages, passed = rescore_attempts(
+        attempt_ids, response_attempts, scores, full_marks(new_answer_key), 60
+    )
+
+    assert attempt_scores.tolist() == [10, 5]
+    assert totals.tolist() == [10, 10]
+    assert percentages.tolist() == [100, 50]
+    assert (percentages <= 100).all()
+    assert passed.tolist() == [True, False]
+
+
+def test_attempts_are_graded_out_of_the_full_key_whatever_they_answered():
+    answer_key = {1: (1, 2), 2: (3, 2)}
+    key = answer_key_arrays(answer_key)
+
+    # Attempt 5 answered one question plus one since removed, 6 answered nothing
+    attempt_ids = np.array([5, 6], dtype=np.int64)
+    response_attempts = np.array([5, 5], dtype=np.int64)
+    response_questions = np.array([1, 99], dtype=np.int64)
+    selected = np.array([1, 1], dtype=np.int64)
+
+    is_correct, scores, marks = rescore_responses(key, response_questions, selected)
+    assert is_correct.tolist() == [True, False]
+    assert marks.tolist() == [2, 0]
+
+    attempt_scores, totals, percentages, passed = rescore_attempts(
+        attempt_ids, response_attempts, scores, full_marks(answer_key), 40
+    )
+    assert attempt_scores.tolist() == [2, 0]
+    assert totals.tolist() == [4, 4]
+    assert percentages.tolist() == [50, 0]
+    assert passed.tolist() == [True, False]
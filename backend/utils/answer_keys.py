@@ -0,0 +1,85 @@
+import json
+import logging
+from utils.grading import load_answer_key
+
+logger = logging.getLogger(__name__)
+
+ANSWER_KEY_TIMEOUT = 86400
+
+
+def _version_key(quiz_id):
+    return f"answer_key:{quiz_id}:version"
+
+
+def _blob_key(quiz_id, version):
+    return f"answer_key:{quiz_id}:v{version}"
+
+
+def get_answer_key_version(quiz_id):
+    """
+    Current content version of a quiz's questions
+
+    Bumped on every question change, so other per-quiz question caches
+    can be keyed by it too. Returns 0 when Redis is unavailable.
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return 0
+
+    try:
+        return int(redis_client.get(_version_key(quiz_id)) or 0)
+    except Exception as e:
+        logger.error(f"Error reading answer key version for quiz {quiz_id}: {str(e)}")
+        return 0
+
+
+def get_answer_key(quiz_id):
+    """
+    Get the answer key for a quiz, served from Redis when possible
+
+    The key is stored as compact JSON {question_id: [correct_option, marks]}
+    under the quiz's current version, so a bump makes every older copy
+    unreachable without having to delete it. Falls back to the database
+    when Redis is unavailable.
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return load_answer_key(quiz_id)
+
+    try:
+        version = redis_client.get(_version_key(quiz_id)) or 0
+        blob = redis_client.get(_blob_key(quiz_id, version))
+        if blob:
+            return {int(qid): tuple(entry) for qid, entry in json.loads(blob).items()}
+    except Exception as e:
+        logger.error(f"Error reading answer key for quiz {quiz_id}: {str(e)}")
+        return load_answer_key(quiz_id)
+
+    answer_key = load_answer_key(quiz_id)
+
+    try:
+        redis_client.set(
+            _blob_key(quiz_id, version),
+            json.dumps({qid: list(entry) for qid, entry in answer_key.items()}, separators=(',', ':')),
+            ex=ANSWER_KEY_TIMEOUT
+        )
+    except Exception as e:
+        logger.error(f"Error caching answer key for quiz {quiz_id}: {str(e)}")
+
+    return answer_key
+
+
+def bump_answer_key_version(quiz_id):
+    """Invalidate the cached answer key for a quiz; call after committing question changes"""
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return None
+
+    try:
+        return redis_client.incr(_version_key(quiz_id))
+    except Exception as e:
+        logger.error(f"Error bumping answer key version for quiz {quiz_id}: {str(e)}")
+        return None
@@ -0,0 +1,163 @@
+import json
+import logging
+from datetime import datetime
+from controllers.models import Quiz, QuizAttempt
+from controllers.extensions import db
+from utils.deadlines import attempt_deadline, register_deadline, clear_deadline
+from utils.autosave import clear_saved_answers
+from utils.question_payloads import shuffled_order
+
+logger = logging.getLogger(__name__)
+
+# In-progress sessions past their deadline, and release markers, live this long
+SESSION_GRACE_SECONDS = 3600
+
+# Left in place of a released session so a rebuild that raced with the
+# submit cannot re-cache the attempt's pre-submit state
+RELEASED = 'released'
+
+
+def _session_key(attempt_id):
+    return f"attempt_session:{attempt_id}"
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+class AttemptSession:
+    """
+    Compact, cacheable view of an attempt and the quiz fields its routes need
+
+    Lets the attempt routes check ownership and status and render an
+    in-progress attempt without loading QuizAttempt and Quiz rows.
+    """
+
+    FIELDS = (
+        'id', 'user_id', 'quiz_id', 'quiz_title', 'passing_score', 'time_duration',
+        'date_of_quiz', 'status', 'score', 'total_marks', 'created_at', 'start_time',
+        'deadline', 'shuffle_seed'
+    )
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def build(cls, attempt, quiz):
+        return cls(
+            id=attempt.id,
+            user_id=attempt.user_id,
+            quiz_id=quiz.id,
+            quiz_title=quiz.title,
+            passing_score=quiz.passing_score,
+            time_duration=quiz.time_duration,
+            date_of_quiz=_isoformat(quiz.start_date),
+            status=attempt.status,
+            score=attempt.score,
+            total_marks=attempt.total_marks,
+            created_at=_isoformat(attempt.created_at),
+            start_time=_isoformat(attempt.start_time),
+            deadline=_isoformat(attempt_deadline(attempt.start_time, quiz.time_duration)) if attempt.start_time else None,
+            # Attempts created before seeds existed are ordered by their id
+            shuffle_seed=attempt.shuffle_seed if attempt.shuffle_seed is not None else attempt.id
+        )
+
+    @classmethod
+    def from_json(cls, raw):
+        return cls(**json.loads(raw))
+
+    def to_json(self):
+        return json.dumps({name: getattr(self, name) for name in self.FIELDS}, separators=(',', ':'))
+
+    def is_owned_by(self, user_id):
+        return self.user_id == int(user_id)
+
+    def question_order(self, question_ids):
+        """This attempt's stable shuffled order of question_ids"""
+        return shuffled_order(question_ids, self.shuffle_seed)
+
+    def ttl(self):
+        """Seconds to keep this session cached"""
+        if self.status == 'in_progress' and self.deadline:
+            remaining = (datetime.fromisoformat(self.deadline) - datetime.now()).total_seconds()
+            return max(int(remaining), 0) + SESSION_GRACE_SECONDS
+        return SESSION_GRACE_SECONDS
+
+
+def _cache_session(session, rebuilt=False):
+    """
+    Cache an in-progress session. Only in-progress state is cached: once
+    submitted, an attempt's status and score are read from the database.
+    A rebuilt session never replaces a release marker.
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is None or session.status != 'in_progress':
+        return
+
+    try:
+        redis_client.set(_session_key(session.id), session.to_json(), ex=session.ttl(), nx=rebuilt)
+    except Exception as e:
+        logger.error(f"Error caching session for attempt {session.id}: {str(e)}")
+
+
+def open_attempt(attempt, quiz):
+    """
+    Cache the session of a newly created attempt and index its deadline.
+    Call after the attempt has been committed.
+    """
+    session = AttemptSession.build(attempt, quiz)
+    _cache_session(session)
+    register_deadline(attempt.id, attempt.start_time, quiz.time_duration)
+
+    return session
+
+
+def get_attempt_session(attempt_id):
+    """
+    Get the session for an attempt, rebuilding it from the database on a miss.
+    Returns None if the attempt does not exist.
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is not None:
+        try:
+            raw = redis_client.get(_session_key(attempt_id))
+            if raw and raw != RELEASED:
+                return AttemptSession.from_json(raw)
+        except Exception as e:
+            logger.error(f"Error reading session for attempt {attempt_id}: {str(e)}")
+
+    row = db.session.query(QuizAttempt, Quiz)\
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)\
+        .filter(QuizAttempt.id == attempt_id)\
+        .first()
+    if not row:
+        return None
+
+    attempt, quiz = row
+    session = AttemptSession.build(attempt, quiz)
+    _cache_session(session, rebuilt=True)
+
+    return session
+
+
+def release_attempt(attempt_id):
+    """
+    Drop the per-attempt Redis state once a submit has been committed:
+    the cached session, autosaved answers and deadline index entry.
+    The session is replaced by a release marker rather than deleted.
+    """
+    from controllers.extensions import redis_client
+
+    clear_saved_answers(attempt_id)
+    clear_deadline(attempt_id)
+
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.set(_session_key(attempt_id), RELEASED, ex=SESSION_GRACE_SECONDS)
+    except Exception as e:
+        logger.error(f"Error dropping session for attempt {attempt_id}: {str(e)}")
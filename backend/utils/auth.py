@@ -0,0 +1,50 @@
+import functools
+from flask import request, current_app
+from flask_jwt_extended import jwt_required as verified_jwt_required, get_jwt_identity
+
+# WSGI environ key carrying the identity a batch request verified. Clients
+# cannot set environ keys, only the HTTP_* entries built from headers.
+BATCH_IDENTITY_ENVIRON = 'quiz_master.batch_identity'
+
+
+def batch_environ():
+    """Environ entries that let a batch's sub-requests trust its verified token"""
+    return {BATCH_IDENTITY_ENVIRON: get_jwt_identity()}
+
+
+def _verified_by_batch():
+    """
+    Whether this is a batch sub-request whose token the batch already verified
+
+    Sub-requests run in the batch request's app context, so the claims the
+    batch verified are still on g; they must match the identity it passed.
+    """
+    identity = request.environ.get(BATCH_IDENTITY_ENVIRON)
+    if identity is None:
+        return False
+    try:
+        return get_jwt_identity() == identity
+    except RuntimeError:
+        return False
+
+
+def jwt_required(*jwt_args, **jwt_kwargs):
+    """
+    flask_jwt_extended's jwt_required, verified once per batch
+
+    Inside a batch sub-request a plain jwt_required() reuses the batch's
+    verified token instead of decoding it again. Calls with options such as
+    fresh or optional always verify.
+    """
+    def wrapper(fn):
+        verified = verified_jwt_required(*jwt_args, **jwt_kwargs)(fn)
+
+        @functools.wraps(fn)
+        def decorator(*args, **kwargs):
+            if not (jwt_args or jwt_kwargs) and _verified_by_batch():
+                return current_app.ensure_sync(fn)(*args, **kwargs)
+            return verified(*args, **kwargs)
+
+        return decorator
+
+    return wrapper
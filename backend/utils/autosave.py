@@ -0,0 +1,147 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Saved answers outlive the quiz timer by this much so a late submit still finds them
+AUTOSAVE_GRACE_SECONDS = 3600
+
+# Hash field set once answers written through to the database have been copied in
+HYDRATED_FIELD = 'hydrated'
+
+# Copy the written-through answers given as ARGV field/value pairs, unless
+# another caller already did, and return the whole hash
+HYDRATE_SCRIPT = """
+if redis.call('hexists', KEYS[1], ARGV[1]) == 0 then
+    redis.call('hset', KEYS[1], unpack(ARGV))
+end
+return redis.call('hgetall', KEYS[1])
+"""
+
+
+def _answers_key(attempt_id):
+    return f"attempt_answers:{attempt_id}"
+
+
+def save_answers(attempt_id, answers, time_duration=None):
+    """
+    Store answers for an in-progress attempt in its Redis hash
+
+    answers maps question_id -> selected_option. Returns False when Redis
+    is unavailable so the caller can fall back to the database.
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return False
+
+    key = _answers_key(attempt_id)
+    try:
+        # Written-through answers go in first, so these overwrite them
+        if not redis_client.hexists(key, HYDRATED_FIELD):
+            _hydrate(redis_client, attempt_id)
+
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={str(qid): int(opt) for qid, opt in answers.items()})
+        pipe.expire(key, (time_duration or 0) * 60 + AUTOSAVE_GRACE_SECONDS)
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.error(f"Error autosaving answers for attempt {attempt_id}: {str(e)}")
+
+    # The caller writes these through to the database; have the next read copy them in
+    try:
+        redis_client.hdel(key, HYDRATED_FIELD)
+    except Exception as e:
+        logger.error(f"Error unmarking autosaved answers for attempt {attempt_id}: {str(e)}")
+    return False
+
+
+def _load_written_answers(attempt_id):
+    """Answers written through to QuizResponse by the autosave fallback"""
+    from controllers.models import QuizResponse
+    from controllers.extensions import db
+
+    return dict(db.session.query(
+        QuizResponse.question_id,
+        QuizResponse.selected_option
+    ).filter(
+        QuizResponse.attempt_id == attempt_id,
+        QuizResponse.selected_option.isnot(None)
+    ).all())
+
+
+def _hydrate(redis_client, attempt_id, ttl=None):
+    """
+    Copy answers written through to QuizResponse into the attempt's hash
+    and mark it, unless it is marked already; returns the hash
+
+    Written-through answers are newer than anything already in the hash,
+    which was last saved to before the write-through.
+    """
+    key = _answers_key(attempt_id)
+    fields = [HYDRATED_FIELD, 1]
+    for qid, opt in _load_written_answers(attempt_id).items():
+        fields.extend((str(qid), int(opt)))
+
+    flat = redis_client.eval(HYDRATE_SCRIPT, 1, key, *fields)
+    if ttl:
+        redis_client.expire(key, ttl)
+    return dict(zip(flat[::2], flat[1::2]))
+
+
+def get_saved_answers(attempt_id):
+    """
+    Return autosaved answers as {question_id: selected_option}
+
+    When Redis is unavailable, or a save to it failed, answers were written
+    through to QuizResponse instead. The first read or save that finds the
+    hash unmarked copies them in, so later reads never touch the database.
+    Without Redis, or when reading it fails, they are read from there.
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return _load_written_answers(attempt_id)
+
+    try:
+        saved = redis_client.hgetall(_answers_key(attempt_id))
+        if HYDRATED_FIELD not in saved:
+            # A hash created here gets an expiry of its own; saves extend it
+            saved = _hydrate(redis_client, attempt_id, None if saved else AUTOSAVE_GRACE_SECONDS)
+        return {int(qid): int(opt) for qid, opt in saved.items() if qid != HYDRATED_FIELD}
+    except Exception as e:
+        logger.error(f"Error reading autosaved answers for attempt {attempt_id}: {str(e)}")
+        return _load_written_answers(attempt_id)
+
+
+def merge_saved_answers(attempt_id, answers):
+    """
+    Fill in autosaved answers for questions missing from a submit payload
+
+    Answers in the payload win over saved ones. The merged list is what gets
+    written behind into QuizResponse by the grading engine.
+    """
+    saved = get_saved_answers(attempt_id)
+    if not saved:
+        return answers or []
+
+    merged = list(answers or [])
+    submitted = {str(a.get('question_id')) for a in merged}
+    for question_id, selected_option in saved.items():
+        if str(question_id) not in submitted:
+            merged.append({'question_id': question_id, 'selected_option': selected_option})
+
+    return merged
+
+
+def clear_saved_answers(attempt_id):
+    """Drop the autosave hash once its answers have been committed"""
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.delete(_answers_key(attempt_id))
+    except Exception as e:
+        logger.error(f"Error clearing autosaved answers for attempt {attempt_id}: {str(e)}")
@@ -0,0 +1,55 @@
+import time
+import logging
+from controllers.extensions import cache
+
+logger = logging.getLogger(__name__)
+
+# Tag versions never expire on their own; an evicted tag reads as changed
+TAG_PREFIX = 'cache_tag:'
+
+
+def _tag_key(tag):
+    return f"{TAG_PREFIX}{tag}"
+
+
+def tag_versions(tags):
+    """Current version of each tag, None for tags never invalidated"""
+    tags = sorted(tags)
+    if not tags:
+        return {}
+    return dict(zip(tags, cache.get_many(*[_tag_key(tag) for tag in tags])))
+
+
+def current_tag_version(tag):
+    """
+    Version of a single tag for use as a validator
+
+    A tag never invalidated, or whose version was evicted, is given a fresh
+    version rather than reading as a constant, so it cannot recreate a
+    validator a client already holds. None when the cache is unavailable.
+    """
+    key = _tag_key(tag)
+    version = cache.get(key)
+    if version is None:
+        # add() keeps whichever version a concurrent reader stored first
+        cache.add(key, time.time_ns(), timeout=0)
+        version = cache.get(key)
+    return version
+
+
+def is_fresh(versions):
+    """Whether tag versions recorded with a cache entry are all still current"""
+    return tag_versions(versions) == versions
+
+
+def invalidate_tags(tags):
+    """Invalidate every cache entry tagged with any of tags"""
+    tags = set(tags)
+    if not tags:
+        return
+
+    version = time.time_ns()
+    try:
+        cache.set_many({_tag_key(tag): version for tag in tags}, timeout=0)
+    except Exception as e:
+        logger.error(f"Error invalidating cache tags {sorted(tags)}: {str(e)}")
@@ -0,0 +1,387 @@
+import logging
+from datetime import datetime
+from controllers.models import Subject, Chapter, Quiz
+from controllers.extensions import db, cache
+from utils.single_flight import acquire_lock, release_lock, wait_for
+
+logger = logging.getLogger(__name__)
+
+CATALOG_KEY = 'catalog_snapshot'
+
+# Outlives the snapshot so versions keep increasing across rebuilds
+CATALOG_VERSION_KEY = 'catalog_version'
+
+# Full rebuilds happen at least this often, healing any lost incremental update
+CATALOG_TIMEOUT = 3600
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _load_subtrees(subject_ids=None):
+    """Load subjects, chapters and quizzes with their maintained counters for some or all subjects"""
+    subjects = db.session.query(
+        Subject.id,
+        Subject.name,
+        Subject.description,
+        Subject.is_active,
+        Subject.created_at,
+        Subject.chapter_count,
+        Subject.quiz_count
+    )
+    chapters = db.session.query(
+        Chapter.id,
+        Chapter.subject_id,
+        Chapter.name,
+        Chapter.description,
+        Chapter.sequence_number,
+        Chapter.is_active,
+        Chapter.created_at,
+        Chapter.quiz_count
+    )
+    quizzes = db.session.query(
+        Quiz.id,
+        Quiz.chapter_id,
+        Quiz.title,
+        Quiz.description,
+        Quiz.start_date,
+        Quiz.start_time,
+        Quiz.end_date,
+        Quiz.end_time,
+        Quiz.start_at,
+        Quiz.end_at,
+        Quiz.time_duration,
+        Quiz.passing_score,
+        Quiz.total_marks,
+        Quiz.auto_lock_after_expiry,
+        Quiz.is_locked,
+        Quiz.is_active,
+        Quiz.created_at,
+        Quiz.question_count
+    ).join(Chapter, Quiz.chapter_id == Chapter.id)
+
+    if subject_ids is not None:
+        subjects = subjects.filter(Subject.id.in_(subject_ids))
+        chapters = chapters.filter(Chapter.subject_id.in_(subject_ids))
+        quizzes = quizzes.filter(Chapter.subject_id.in_(subject_ids))
+
+    entries = {'subjects': {}, 'chapters': {}, 'quizzes': {}}
+
+    for s in subjects.all():
+        entries['subjects'][str(s.id)] = {
+            'id': s.id,
+            'name': s.name,
+            'description': s.description,
+            'is_active': s.is_active,
+            'created_at': _isoformat(s.created_at),
+            'chapter_count': s.chapter_count or 0,
+            'quiz_count': s.quiz_count or 0
+        }
+
+    for c in chapters.all():
+        entries['chapters'][str(c.id)] = {
+            'id': c.id,
+            'subject_id': c.subject_id,
+            'name': c.name,
+            'description': c.description,
+            'sequence_number': c.sequence_number,
+            'is_active': c.is_active,
+            'created_at': _isoformat(c.created_at),
+            'quiz_count': c.quiz_count or 0
+        }
+
+    for q in quizzes.all():
+        entries['quizzes'][str(q.id)] = {
+            'id': q.id,
+            'chapter_id': q.chapter_id,
+            'title': q.title,
+            'description': q.description,
+            'start_date': _isoformat(q.start_date),
+            'start_time': q.start_time.strftime('%H:%M') if q.start_time else None,
+            'end_date': _isoformat(q.end_date),
+            'end_time': q.end_time.strftime('%H:%M') if q.end_time else None,
+            'start_at': _isoformat(q.start_at),
+            'end_at': _isoformat(q.end_at),
+            'time_duration': q.time_duration,
+            'passing_score': q.passing_score,
+            'total_marks': q.total_marks,
+            'auto_lock_after_expiry': q.auto_lock_after_expiry,
+            'is_locked': q.is_locked,
+            'is_active': q.is_active,
+            'created_at': _isoformat(q.created_at),
+            'question_count': q.question_count or 0
+        }
+
+    return entries
+
+
+def _shared_cache():
+    """The cache shared by all workers, past any in-process tier that may lag a write"""
+    return getattr(cache.cache, 'remote', cache.cache)
+
+
+def _load(shared=False):
+    try:
+        return (_shared_cache() if shared else cache).get(CATALOG_KEY)
+    except Exception as e:
+        logger.error(f"Error reading catalog snapshot: {str(e)}")
+        return None
+
+
+def _load_version(shared=False):
+    try:
+        return (_shared_cache() if shared else cache).get(CATALOG_VERSION_KEY) or 0
+    except Exception as e:
+        logger.error(f"Error reading catalog version: {str(e)}")
+        return 0
+
+
+def _store(catalog):
+    try:
+        cache.set(CATALOG_KEY, catalog, timeout=CATALOG_TIMEOUT)
+        cache.set(CATALOG_VERSION_KEY, catalog['version'], timeout=0)
+    except Exception as e:
+        logger.error(f"Error storing catalog snapshot: {str(e)}")
+
+
+def _locked(rebuild):
+    """
+    Run a snapshot rebuild holding the catalog lock, waiting for any other
+    writer to finish, so concurrent writes neither lose a subtree nor store
+    two different snapshots under the same version
+    """
+    token = acquire_lock(CATALOG_KEY) or wait_for(lambda: acquire_lock(CATALOG_KEY))
+    if token is None:
+        logger.warning("Timed out waiting for the catalog lock, rebuilding anyway")
+
+    try:
+        return rebuild()
+    finally:
+        release_lock(CATALOG_KEY, token)
+
+
+def _build():
+    catalog = _load_subtrees()
+    catalog['version'] = _load_version(shared=True) + 1
+    catalog['built_at'] = datetime.now().isoformat()
+    _store(catalog)
+    return catalog
+
+
+def build_catalog():
+    """Materialize the whole subject -> chapter -> quiz tree as a new version"""
+    return _locked(_build)
+
+
+def get_catalog():
+    """Get the current catalog snapshot, building it on a miss"""
+    catalog = _load()
+    if catalog is not None:
+        return catalog
+
+    # One request rebuilds a missing snapshot while the others wait for it
+    token = acquire_lock(CATALOG_KEY)
+    if token is None:
+        catalog = wait_for(_load)
+        if catalog is not None:
+            return catalog
+
+    try:
+        return _build()
+    finally:
+        release_lock(CATALOG_KEY, token)
+
+
+def get_catalog_version():
+    """Current catalog version, without loading the snapshot when it is cached"""
+    version = _load_version()
+    if version:
+        return version
+
+    return get_catalog()['version']
+
+
+def _subject_of(chapter_id=None, quiz_id=None):
+    if chapter_id is not None:
+        return db.session.query(Chapter.subject_id).filter(Chapter.id == chapter_id).scalar()
+    if quiz_id is not None:
+        return db.session.query(Chapter.subject_id)\
+            .join(Quiz, Quiz.chapter_id == Chapter.id)\
+            .filter(Quiz.id == quiz_id).scalar()
+    return None
+
+
+def refresh_catalog(subject_id=None, chapter_id=None, quiz_id=None):
+    """
+    Rebuild the part of the catalog under one subject after an admin write
+
+    Pass whichever id the write knows; for deletes pass the parent subject
+    captured before the delete. Call after committing.
+    """
+    if subject_id is None:
+        subject_id = _subject_of(chapter_id, quiz_id)
+    if subject_id is None:
+        return None
+
+    return _locked(lambda: _refresh(subject_id))
+
+
+def _refresh(subject_id):
+    catalog = _load(shared=True)
+    if catalog is None:
+        return _build()
+
+    # The loaded snapshot may be shared with other requests, so edit a copy
+    catalog = {**catalog, **{section: dict(catalog[section]) for section in ('subjects', 'chapters', 'quizzes')}}
+
+    # Drop the old subtree, then splice in a freshly loaded one
+    stale_chapters = {cid for cid, c in catalog['chapters'].items() if c['subject_id'] == subject_id}
+    catalog['subjects'].pop(str(subject_id), None)
+    for cid in stale_chapters:
+        catalog['chapters'].pop(cid)
+    catalog['quizzes'] = {
+        qid: q for qid, q in catalog['quizzes'].items()
+        if str(q['chapter_id']) not in stale_chapters
+    }
+
+    subtree = _load_subtrees([subject_id])
+    for section in ('subjects', 'chapters', 'quizzes'):
+        catalog[section].update(subtree[section])
+
+    catalog['version'] = max(catalog['version'], _load_version(shared=True)) + 1
+    catalog['built_at'] = datetime.now().isoformat()
+    _store(catalog)
+    return catalog
+
+
+def _schedule(quiz, now):
+    start_at = datetime.fromisoformat(quiz['start_at']) if quiz['start_at'] else None
+    end_at = datetime.fromisoformat(quiz['end_at']) if quiz['end_at'] else None
+
+    is_available = bool(
+        quiz['is_active'] and not quiz['is_locked']
+        and start_at is not None and start_at <= now
+        and (end_at is None or end_at >= now)
+    )
+    return is_available, Quiz.time_remaining(start_at, now), Quiz.time_remaining(end_at, now)
+
+
+def catalog_subjects(catalog):
+    """Active subjects with chapter and quiz counts"""
+    return [{
+        'id': s['id'],
+        'name': s['name'],
+        'description': s['description'],
+        'created_at': s['created_at'],
+        'chapter_count': s['chapter_count'],
+        'quiz_count': s['quiz_count']
+    } for s in sorted(catalog['subjects'].values(), key=lambda s: s['id']) if s['is_active']]
+
+
+def catalog_chapters(catalog, subject_id):
+    """Active chapters of a subject with quiz counts"""
+    return [{
+        'id': c['id'],
+        'name': c['name'],
+        'description': c['description'],
+        'created_at': c['created_at'],
+        'quiz_count': c['quiz_count']
+    } for c in sorted(catalog['chapters'].values(), key=lambda c: c['id'])
+        if c['subject_id'] == subject_id and c['is_active']]
+
+
+def catalog_quizzes(catalog, chapter_id, now=None):
+    """Active quizzes of a chapter with their current availability"""
+    now = now or datetime.now()
+    result = []
+
+    for q in sorted(catalog['quizzes'].values(), key=lambda q: q['id']):
+        if q['chapter_id'] != chapter_id or not q['is_active']:
+            continue
+
+        is_available, time_until_start, time_until_end = _schedule(q, now)
+        result.append({
+            'id': q['id'],
+            'title': q['title'],
+            'description': q['description'],
+            'start_date': q['start_date'],
+            'start_time': q['start_time'],
+            'end_date': q['end_date'],
+            'end_time': q['end_time'],
+            'time_duration': q['time_duration'],
+            'passing_score': q['passing_score'],
+            'total_marks': q['total_marks'],
+            'created_at': q['created_at'],
+            'question_count': q['question_count'],
+            'is_active': q['is_active'],
+            'is_locked': q['is_locked'],
+            'is_available': is_available,
+            'time_until_start': str(time_until_start) if time_until_start else None,
+            'time_until_end': str(time_until_end) if time_until_end else None,
+            'date_of_quiz': q['start_date']
+        })
+
+    return result
+
+
+def catalog_quiz(catalog, quiz_id, now=None):
+    """One active quiz with its current availability, or None"""
+    q = catalog['quizzes'].get(str(quiz_id))
+    if q is None or not q['is_active']:
+        return None
+
+    is_available, time_until_start, time_until_end = _schedule(q, now or datetime.now())
+    return {
+        'id': q['id'],
+        'title': q['title'],
+        'description': q['description'],
+        'start_date': q['start_date'],
+        'start_time': q['start_time'],
+        'end_date': q['end_date'],
+        'end_time': q['end_time'],
+        'time_duration': q['time_duration'],
+        'passing_score': q['passing_score'],
+        'total_marks': q['total_marks'],
+        'chapter_id': q['chapter_id'],
+        'created_at': q['created_at'],
+        'is_active': q['is_active'],
+        'is_available': is_available,
+        'is_locked': q['is_locked'],
+        'time_until_start': str(time_until_start) if time_until_start else None,
+        'time_until_end': str(time_until_end) if time_until_end else None
+    }
+
+
+def catalog_available_quizzes(catalog, now=None):
+    """Quizzes open for attempts right now, latest start first"""
+    now = now or datetime.now()
+    result = []
+
+    for q in sorted(catalog['quizzes'].values(), key=lambda q: q['start_at'] or '', reverse=True):
+        is_available, _, time_until_end = _schedule(q, now)
+        if not is_available:
+            continue
+
+        chapter = catalog['chapters'].get(str(q['chapter_id']))
+        subject = catalog['subjects'].get(str(chapter['subject_id'])) if chapter else None
+
+        result.append({
+            'id': q['id'],
+            'title': q['title'],
+            'description': q['description'],
+            'start_date': q['start_date'],
+            'start_time': q['start_time'],
+            'end_date': q['end_date'],
+            'end_time': q['end_time'],
+            'time_duration': q['time_duration'],
+            'chapter_name': chapter['name'] if chapter else None,
+            'subject_name': subject['name'] if subject else None,
+            'is_available': True,
+            'is_locked': q['is_locked'],
+            'time_until_start': None,
+            'time_until_end': str(time_until_end) if time_until_end else None,
+            'date_of_quiz': q['start_date'] or now.date().isoformat()
+        })
+
+    return result
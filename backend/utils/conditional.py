@@ -0,0 +1,145 @@
+import functools
+import logging
+from datetime import datetime
+from flask import request, make_response
+from sqlalchemy import func
+from controllers.extensions import db
+from utils.catalog import get_catalog_version
+from utils.cache_tags import current_tag_version
+from controllers.serialization import wants_msgpack
+
+logger = logging.getLogger(__name__)
+
+# Clients may keep a copy but must revalidate it before every use
+REVALIDATE = 'private, no-cache'
+
+# Finished attempts only change if an admin regrades the quiz, so cap the lifetime at a day
+IMMUTABLE = 'private, max-age=86400, immutable'
+
+
+def _stamp(value):
+    return value.strftime('%Y%m%d%H%M%S') if value else '0'
+
+
+def collection_version(model, *criteria, extra=()):
+    """
+    Validator for the rows of a model matching criteria, from one aggregate query
+
+    The tag covers the row count and latest updated_at; pass extra aggregates
+    for columns that can change within the same second.
+    """
+    count, last_modified, *rest = db.session.query(
+        func.count(),
+        func.max(model.updated_at),
+        *extra
+    ).select_from(model).filter(*criteria).one()
+
+    tag = '-'.join([model.__tablename__, str(count), _stamp(last_modified), *map(str, rest)])
+    return tag, last_modified
+
+
+def tag_version(tag):
+    """
+    Validator from a cache tag's version, which every committed change to a
+    model carrying the tag bumps; one cache read instead of a table aggregate
+
+    None, meaning no validator, when the cache cannot provide a version.
+    """
+    version = current_tag_version(tag)
+    if version is None:
+        return None
+    return f"{tag}-{version}", None
+
+
+def catalog_version(scheduled=False):
+    """
+    Validator for data served from or mirrored by the catalog snapshot
+
+    Set scheduled for payloads with availability fields: schedules have
+    minute precision, so the tag also changes every minute.
+    """
+    tag = f"catalog-{get_catalog_version()}"
+    if scheduled:
+        tag = f"{tag}-{datetime.now().strftime('%Y%m%d%H%M')}"
+    return tag, None
+
+
+def catalog_validator(**kwargs):
+    return catalog_version()
+
+
+def scheduled_catalog_validator(**kwargs):
+    return catalog_version(scheduled=True)
+
+
+def catalog_key():
+    """Cache key version for views served from the catalog, as for catalog_validator"""
+    return catalog_version()[0]
+
+
+def scheduled_catalog_key():
+    return catalog_version(scheduled=True)[0]
+
+
+def combine(*validators):
+    """Merge several (tag, last_modified) validators into one, or None if any is None"""
+    if any(v is None for v in validators):
+        return None
+    stamps = [last_modified for _, last_modified in validators if last_modified]
+    return '.'.join(tag for tag, _ in validators), max(stamps) if stamps else None
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional(validator, immutable=False):
+    """
+    Conditional GET decorator answering 304 without running the view
+
+    Args:
+        validator: Called with the view's kwargs; returns (etag, last_modified),
+            or None to serve the view without validators
+        immutable: Mark successful responses as never changing
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapped(*args, **kwargs):
+            try:
+                validators = validator(**kwargs)
+            except Exception as e:
+                logger.error(f"Error computing validators for {func.__name__}: {str(e)}")
+                validators = None
+
+            if validators is None:
+                return func(*args, **kwargs)
+
+            etag, last_modified = validators
+            # JSON and MessagePack bodies are different representations
+            if wants_msgpack():
+                etag = f"{etag}-msgpack"
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(func(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = IMMUTABLE if immutable else REVALIDATE
+            response.vary.add('Authorization')
+            response.vary.add('Accept')
+
+            return response
+
+        return wrapped
+    return decorator
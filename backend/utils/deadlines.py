@@ -0,0 +1,71 @@
+import logging
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_INDEX_KEY = "attempt_deadlines"
+
+
+def attempt_deadline(start_time, time_duration):
+    """Deadline of an attempt that started at start_time on a quiz of time_duration minutes"""
+    return start_time + timedelta(minutes=time_duration or 0)
+
+
+def register_deadline(attempt_id, start_time, time_duration):
+    """Add an in-progress attempt to the deadline index"""
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return False
+
+    try:
+        deadline = attempt_deadline(start_time, time_duration)
+        redis_client.zadd(DEADLINE_INDEX_KEY, {str(attempt_id): deadline.timestamp()})
+        return True
+    except Exception as e:
+        logger.error(f"Error registering deadline for attempt {attempt_id}: {str(e)}")
+        return False
+
+
+def clear_deadline(attempt_id):
+    """Remove an attempt from the deadline index once it has been submitted"""
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.zrem(DEADLINE_INDEX_KEY, str(attempt_id))
+    except Exception as e:
+        logger.error(f"Error clearing deadline for attempt {attempt_id}: {str(e)}")
+
+
+def get_expired_attempt_ids(now, limit):
+    """
+    Return up to limit attempt ids whose deadline is at or before now,
+    or None when the index is unavailable
+    """
+    from controllers.extensions import redis_client
+
+    if redis_client is None:
+        return None
+
+    try:
+        ids = redis_client.zrangebyscore(DEADLINE_INDEX_KEY, 0, now.timestamp(), start=0, num=limit)
+        return [int(i) for i in ids]
+    except Exception as e:
+        logger.error(f"Error reading deadline index: {str(e)}")
+        return None
+
+
+def remove_deadlines(attempt_ids):
+    """Remove a batch of attempts from the deadline index"""
+    from controllers.extensions import redis_client
+
+    if redis_client is None or not attempt_ids:
+        return
+
+    try:
+        redis_client.zrem(DEADLINE_INDEX_KEY, *[str(i) for i in attempt_ids])
+    except Exception as e:
+        logger.error(f"Error removing deadlines: {str(e)}")
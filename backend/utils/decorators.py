@@ -1,8 +1,14 @@
 import functools
+import math
+import random
 import time
 import logging
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 from controllers.extensions import cache, redis_client
+from utils.cache_tags import tag_versions, is_fresh
+from controllers.serialization import wants_msgpack
+from utils.response_cache import freeze_response, is_frozen_response, thaw_response
+from utils.single_flight import LOCK_TIMEOUT, acquire_lock, release_lock, wait_for
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -68,14 +74,56 @@ def rate_limit(limit=30, per=60, by="ip"):
     return decorator
 
 
-def cached(timeout=300, key_prefix='view', user_specific=False):
+ENTRY_FIELDS = {'response', 'tags', 'expires_at', 'delta'}
+
+
+def _load_entry(cache_key, tagged):
+    """
+    Cached entry for cache_key, or None when missing or invalidated by a tag
+
+    Entries outlive their timeout by the stale window, so a returned entry
+    may already be past expires_at.
+    """
+    entry = cache.get(cache_key)
+    if not isinstance(entry, dict) or entry.keys() != ENTRY_FIELDS or not is_frozen_response(entry['response']):
+        return None
+    if tagged and not is_fresh(entry['tags']):
+        return None
+    return entry
+
+
+def _should_refresh(entry, now, beta):
+    """
+    Probabilistic early expiration: the closer to expires_at, and the longer
+    the value took to compute, the likelier one caller refreshes it early
+    """
+    jitter = -entry['delta'] * beta * math.log(1.0 - random.random())
+    return now + jitter >= entry['expires_at']
+
+
+def cached(timeout=300, key_prefix='view', user_specific=False, tags=None,
+           version=None, stale_ttl=60, beta=1.0, lock_timeout=LOCK_TIMEOUT):
     """
     Caching decorator that supports user-specific caching with fallback
     
+    Successful responses are stored pre-serialized, as body bytes, status,
+    content type and ETag, so a hit copies bytes instead of rebuilding the
+    payload. JSON and MessagePack representations are cached separately.
+    
     Args:
         timeout: Cache timeout in seconds
         key_prefix: Prefix for cache key
         user_specific: Whether to include user ID in cache key
+        tags: Dependency tags such as 'quiz:{quiz_id}' or 'user:{user_id}',
+            formatted with the view kwargs and user_id. Committing a change
+            to a tagged model invalidates the entry before its timeout.
+        version: Callable returning a string folded into the key, such as a
+            validator tag; a new value starts a fresh entry
+        stale_ttl: Seconds past the timeout an entry may still be served
+            while another request recomputes it. Entries invalidated by a
+            tag are never served stale.
+        beta: Eagerness of probabilistic early refresh; 0 disables it
+        lock_timeout: Seconds one request may hold the recompute lock
     """
     def decorator(func):
         @functools.wraps(func)
@@ -93,37 +141,83 @@ def cached(timeout=300, key_prefix='view', user_specific=False):
                 if args_key:
                     cache_key = f"{cache_key}:{args_key}"
                     
-                if user_specific:
+                user_id = None
+                if user_specific or tags:
                     try:
                         user_id = get_jwt_identity()
-                        if user_id:
-                            cache_key = f"{cache_key}:user={user_id}"
                     except Exception:
                         logger.debug("Could not get user identity for cache key")
                 
-                if cache:
-                    # Try to get from cache
-                    try:
-                        cached_result = cache.get(cache_key)
-                        if cached_result is not None:
-                            return cached_result
-                    except Exception as cache_error:
-                        logger.error(f"Error retrieving from cache: {str(cache_error)}")
+                if user_specific and user_id:
+                    cache_key = f"{cache_key}:user={user_id}"
                 
-                # Generate the response
-                result = func(*args, **kwargs)
+                if version is not None:
+                    cache_key = f"{cache_key}:v={version()}"
                 
-                if cache:
+                if wants_msgpack():
+                    cache_key = f"{cache_key}:msgpack"
+                
+                entry_tags = [tag.format(user_id=user_id, **kwargs) for tag in tags or []]
+                
+                if not cache:
+                    return func(*args, **kwargs)
+                
+                # Try to get from cache
+                entry = None
+                try:
+                    entry = _load_entry(cache_key, bool(entry_tags))
+                    if entry is not None and not _should_refresh(entry, time.time(), beta):
+                        return thaw_response(entry['response'])
+                except Exception as cache_error:
+                    logger.error(f"Error retrieving from cache: {str(cache_error)}")
+                
+                # Expired, due for early refresh, or missing: one request recomputes
+                token = acquire_lock(cache_key, lock_timeout)
+                if token is None:
+                    if entry is not None:
+                        return thaw_response(entry['response'])
+                    
+                    entry = wait_for(lambda: _load_entry(cache_key, bool(entry_tags)), lock_timeout)
+                    if entry is not None:
+                        return thaw_response(entry['response'])
+                
+                try:
+                    versions = None
                     try:
-                        cache.set(cache_key, result, timeout=timeout)
+                        # Read versions before building, so a concurrent invalidation wins
+                        versions = tag_versions(entry_tags)
                     except Exception as cache_error:
-                        logger.error(f"Error writing to cache: {str(cache_error)}")
-                
-                return result
+                        logger.error(f"Error retrieving from cache: {str(cache_error)}")
+                    
+                    # Generate the response
+                    started = time.monotonic()
+                    response = make_response(func(*args, **kwargs))
+                    delta = time.monotonic() - started
+                    
+                    # Errors and streamed bodies are never cached
+                    frozen = freeze_response(response) if response.status_code == 200 else None
+                    if frozen is not None:
+                        response.set_etag(frozen['etag'])
+                    
+                    if frozen is not None and versions is not None:
+                        try:
+                            entry = {
+                                'response': frozen,
+                                'tags': versions,
+                                'expires_at': time.time() + timeout if timeout else math.inf,
+                                'delta': delta
+                            }
+                            cache.set(cache_key, entry, timeout=timeout + stale_ttl if timeout else 0)
+                        except Exception as cache_error:
+                            logger.error(f"Error writing to cache: {str(cache_error)}")
+                    
+                    return response
+                finally:
+                    release_lock(cache_key, token)
                 
             except Exception as e:
                 logger.error(f"Unexpected error in cached decorator for {func.__name__}: {str(e)}")
                 return func(*args, **kwargs)
             
         return wrapped
-    return decorator
\ No newline at end of file
+    return decorator
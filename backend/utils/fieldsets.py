@@ -0,0 +1,69 @@
+from flask import request
+from controllers.extensions import db
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+def hm(value):
+    return value.strftime('%H:%M') if value else None
+
+
+class Fieldset:
+    """
+    Declarative projection of a model for ?fields= sparse fieldsets
+
+    Each output field names the columns it needs and how to render them, so
+    a request selects only those columns and only runs the renderers it asked
+    for. Fields are given as name -> column, name -> (column, render) or
+    name -> (columns, render) where render takes the whole row.
+    """
+
+    def __init__(self, model, **fields):
+        self.model = model
+        self.fields = {}
+
+        for name, spec in fields.items():
+            if not isinstance(spec, tuple):
+                spec = (spec, None)
+            columns, render = spec
+
+            if isinstance(columns, (list, tuple)):
+                self.fields[name] = (tuple(columns), render)
+            else:
+                key = columns.key
+                self.fields[name] = (
+                    (columns,),
+                    (lambda row, key=key, render=render: render(getattr(row, key)))
+                    if render else (lambda row, key=key: getattr(row, key))
+                )
+
+    def requested(self, default):
+        """
+        Field names from ?fields=, or default when absent
+
+        Raises ValueError naming any field this fieldset does not know.
+        """
+        raw = request.args.get('fields')
+        if not raw:
+            return list(default)
+
+        names = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        return names
+
+    def query(self, names):
+        """Query selecting just the columns behind names, plus the primary key"""
+        columns = {self.model.id.key: self.model.id}
+        for name in names:
+            for column in self.fields[name][0]:
+                columns.setdefault(column.key, column)
+
+        return db.session.query(*columns.values())
+
+    def serialize(self, row, names):
+        return {name: self.fields[name][1](row) for name in names}
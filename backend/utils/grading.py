@@ -0,0 +1,142 @@
+from datetime import datetime
+from sqlalchemy import insert, select, literal
+from controllers.models import Question, QuizResponse
+from controllers.extensions import db
+
+
+def load_answer_key(quiz_id):
+    """
+    Load the answer key for a quiz in a single query
+
+    Returns a dict of question_id -> (correct_option, marks)
+    """
+    rows = db.session.query(
+        Question.id,
+        Question.correct_option,
+        Question.marks
+    ).filter(Question.quiz_id == quiz_id).all()
+
+    return {r.id: (r.correct_option, r.marks) for r in rows}
+
+
+def full_marks(answer_key):
+    """Marks available across every question of an answer key"""
+    return sum(marks for _, marks in answer_key.values())
+
+
+def _as_int(value, default=None):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def grade_answers(answer_key, answers):
+    """
+    Score submitted answers against an answer key in one pass
+
+    Answers for questions outside the key are ignored and a repeated
+    question_id keeps the last answer sent.
+
+    Returns (graded, total_score, answered_marks) where graded maps
+    question_id -> {'selected_option', 'is_correct', 'score'}
+    """
+    graded = {}
+    answered_marks = {}
+
+    for answer in answers or []:
+        question_id = _as_int(answer.get('question_id'))
+        if question_id not in answer_key:
+            continue
+
+        selected_option = _as_int(answer.get('selected_option'), 0)
+        if selected_option < 0:
+            selected_option = 0
+
+        correct_option, marks = answer_key[question_id]
+        is_correct = selected_option == correct_option
+
+        graded[question_id] = {
+            'selected_option': selected_option,
+            'is_correct': is_correct,
+            'score': marks if is_correct else 0
+        }
+        answered_marks[question_id] = marks
+
+    total_score = sum(g['score'] for g in graded.values())
+    return graded, total_score, sum(answered_marks.values())
+
+
+def save_responses(attempt_id, graded):
+    """
+    Upsert graded responses for an attempt in bulk
+
+    One SELECT to find existing rows, then at most one bulk UPDATE and
+    one bulk INSERT regardless of how many questions were answered.
+    """
+    if not graded:
+        return
+
+    existing = dict(db.session.query(
+        QuizResponse.question_id,
+        QuizResponse.id
+    ).filter(QuizResponse.attempt_id == attempt_id).all())
+
+    updates = []
+    inserts = []
+    for question_id, row in graded.items():
+        mapping = {'attempt_id': attempt_id, 'question_id': question_id, **row}
+        if question_id in existing:
+            mapping['id'] = existing[question_id]
+            updates.append(mapping)
+        else:
+            inserts.append(mapping)
+
+    if updates:
+        db.session.bulk_update_mappings(QuizResponse, updates)
+    if inserts:
+        db.session.bulk_insert_mappings(QuizResponse, inserts)
+
+
+def precreate_responses(attempt_id, quiz_id):
+    """
+    Create an empty QuizResponse for every question of a quiz
+
+    Runs as a single INSERT ... SELECT so question rows never leave the
+    database, whatever the size of the quiz.
+    """
+    result = db.session.execute(
+        insert(QuizResponse).from_select(
+            ['attempt_id', 'question_id'],
+            select(literal(attempt_id), Question.id).where(Question.quiz_id == quiz_id)
+        )
+    )
+    return result.rowcount
+
+
+def grade_attempt(attempt, quiz, answers, time_taken, total_marks=None, answer_key=None):
+    """
+    Grade a submission and update the attempt in place
+
+    total_marks defaults to the marks of the questions that were answered.
+    The caller is responsible for committing the session.
+    """
+    if answer_key is None:
+        from utils.answer_keys import get_answer_key
+        answer_key = get_answer_key(quiz.id)
+
+    graded, total_score, answered_marks = grade_answers(answer_key, answers)
+    save_responses(attempt.id, graded)
+
+    if total_marks is None:
+        total_marks = answered_marks
+
+    attempt.status = 'completed'
+    attempt.score = total_score
+    attempt.total_marks = total_marks
+    attempt.score_percentage = round((total_score / total_marks) * 100) if total_marks and total_marks > 0 else 0
+    attempt.is_passed = attempt.score_percentage >= quiz.passing_score
+    attempt.time_taken = time_taken
+    attempt.end_time = attempt.end_time or datetime.now()
+
+    return graded
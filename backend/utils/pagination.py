@@ -0,0 +1,91 @@
+import logging
+from flask import request, jsonify, url_for
+from sqlalchemy import func, text
+from controllers.extensions import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def page_params():
+    """Read ?after=<id>&limit=<n> from the request, clamping limit"""
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return after, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, key_column, after, limit):
+    """
+    Fetch one page of query ordered by key_column, starting after the cursor
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if after is not None:
+        query = query.filter(key_column > after)
+
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, getattr(rows[-1], key_column.key)
+
+    return rows, None
+
+
+def _table_estimate(model):
+    """Planner row estimate for a whole table, or None where there is none"""
+    dialect = db.engine.dialect.name
+    table = model.__tablename__
+
+    if dialect == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = :table"
+    elif dialect in ('mysql', 'mariadb'):
+        sql = ("SELECT table_rows FROM information_schema.tables "
+               "WHERE table_schema = DATABASE() AND table_name = :table")
+    else:
+        return None
+
+    estimate = db.session.execute(text(sql), {'table': table}).scalar()
+    # Never-analyzed tables report -1 or 0 rows
+    return int(estimate) if estimate and estimate > 0 else None
+
+
+def count_rows(model, *criteria, mode='exact'):
+    """
+    Count the rows of a model matching criteria
+
+    With mode='estimate' an unfiltered count is read from planner statistics
+    where the database keeps them; filtered counts use an indexed COUNT.
+    """
+    if mode == 'estimate' and not criteria:
+        try:
+            estimate = _table_estimate(model)
+            if estimate is not None:
+                return estimate
+        except Exception as e:
+            logger.error(f"Error estimating rows of {model.__tablename__}: {str(e)}")
+
+    return db.session.query(func.count(model.id)).filter(*criteria).scalar()
+
+
+def paginated_response(items, next_cursor, limit, model, *criteria):
+    """
+    JSON array of one page, with the cursor in X-Next-Cursor and a Link header
+
+    ?total=estimate or ?total=exact adds X-Total-Count.
+    """
+    response = jsonify(items)
+
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        # Keep filters and field selections on the next page
+        args = {k: v for k, v in request.args.items() if k not in ('after', 'limit', *request.view_args)}
+        next_url = url_for(request.endpoint, **request.view_args, **args, after=next_cursor, limit=limit)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+
+    total = request.args.get('total')
+    if total in ('estimate', 'exact'):
+        response.headers['X-Total-Count'] = str(count_rows(model, *criteria, mode=total))
+
+    return response
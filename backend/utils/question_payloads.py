@@ -0,0 +1,118 @@
+import json
+import logging
+import random
+from flask import current_app, jsonify
+from controllers.models import Question
+from controllers.extensions import db
+from utils.answer_keys import get_answer_key_version
+from controllers.serialization import wants_msgpack
+
+logger = logging.getLogger(__name__)
+
+QUESTION_PAYLOAD_TIMEOUT = 86400
+
+
+def _payload_key(quiz_id, version):
+    return f"quiz_questions:{quiz_id}:v{version}"
+
+
+def _encode_question(q):
+    """
+    Pre-encode a question as a JSON object with its closing brace left off,
+    so per-attempt fields can be appended without decoding it again
+    """
+    return json.dumps({
+        'id': q.id,
+        'question_text': q.question_text,
+        'option_1': q.option_1,
+        'option_2': q.option_2,
+        'option_3': q.option_3,
+        'option_4': q.option_4,
+        'marks': q.marks
+    }, separators=(',', ':'))[:-1]
+
+
+def _load_question_fragments(quiz_id):
+    questions = db.session.query(
+        Question.id,
+        Question.question_text,
+        Question.option_1,
+        Question.option_2,
+        Question.option_3,
+        Question.option_4,
+        Question.marks
+    ).filter(Question.quiz_id == quiz_id).all()
+
+    return {q.id: _encode_question(q) for q in questions}
+
+
+def get_question_fragments(quiz_id):
+    """
+    Get the pre-encoded questions shown to students as {question_id: fragment}
+
+    Stored as a Redis hash per quiz content version and shared by every
+    attempt, so only the first request after a question change reads the
+    database and no request re-serializes a question.
+    """
+    from controllers.extensions import redis_client
+
+    version = get_answer_key_version(quiz_id)
+
+    if redis_client is not None:
+        try:
+            raw = redis_client.hgetall(_payload_key(quiz_id, version))
+            if raw:
+                return {int(qid): fragment for qid, fragment in raw.items()}
+        except Exception as e:
+            logger.error(f"Error reading question payload for quiz {quiz_id}: {str(e)}")
+
+    fragments = _load_question_fragments(quiz_id)
+
+    if redis_client is not None and fragments:
+        try:
+            pipe = redis_client.pipeline()
+            pipe.hset(_payload_key(quiz_id, version), mapping={str(qid): f for qid, f in fragments.items()})
+            pipe.expire(_payload_key(quiz_id, version), QUESTION_PAYLOAD_TIMEOUT)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error caching question payload for quiz {quiz_id}: {str(e)}")
+
+    return fragments
+
+
+def render_questions(fragments, order, selected_options):
+    """Join pre-encoded questions into a JSON array body, adding each selected_option"""
+    parts = []
+    for question_id in order:
+        selected = selected_options.get(question_id)
+        parts.append(f'{fragments[question_id]},"selected_option":{"null" if selected is None else int(selected)}}}')
+    return '[' + ','.join(parts) + ']'
+
+
+def questions_response(fragments, order, selected_options):
+    """
+    Response with the questions in order and each selected_option
+
+    JSON joins the pre-encoded fragments as they are; a client negotiating
+    MessagePack gets them decoded and packed through jsonify like any view.
+    """
+    if wants_msgpack():
+        return jsonify([
+            {**json.loads(fragments[question_id] + '}'), 'selected_option': selected_options.get(question_id)}
+            for question_id in order
+        ])
+
+    response = current_app.response_class(render_questions(fragments, order, selected_options), mimetype='application/json')
+    response.vary.add('Accept')
+    return response
+
+
+def new_shuffle_seed():
+    return random.getrandbits(31)
+
+
+def shuffled_order(question_ids, seed):
+    """Deterministic per-attempt order of question_ids for a shuffle seed"""
+    order = sorted(question_ids)
+    random.Random(seed).shuffle(order)
+    return order
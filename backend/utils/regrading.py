@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def answer_key_arrays(answer_key):
+    """Turn an answer key dict into sorted question ids with aligned correct options and marks"""
+    question_ids = np.array(sorted(answer_key), dtype=np.int64)
+    correct = np.array([answer_key[qid][0] for qid in question_ids.tolist()], dtype=np.int64)
+    marks = np.array([answer_key[qid][1] for qid in question_ids.tolist()], dtype=np.int64)
+    return question_ids, correct, marks
+
+
+def rescore_responses(key_arrays, question_ids, selected):
+    """
+    Rescore responses against the key arrays without a Python loop
+
+    Responses to questions that are no longer in the key score zero and
+    carry no marks. Returns (is_correct, scores, marks) arrays aligned with
+    the inputs, marks being what each response could have scored.
+    """
+    key_ids, correct, key_marks = key_arrays
+    if len(key_ids) == 0:
+        empty = np.zeros(len(question_ids), dtype=np.int64)
+        return np.zeros(len(question_ids), dtype=bool), empty, empty
+
+    idx = np.clip(np.searchsorted(key_ids, question_ids), 0, len(key_ids) - 1)
+    known = key_ids[idx] == question_ids
+    marks = np.where(known, key_marks[idx], 0)
+    is_correct = known & (selected == correct[idx])
+    scores = np.where(is_correct, marks, 0)
+    return is_correct, scores, marks
+
+
+def rescore_attempts(attempt_ids, response_attempts, scores, total_marks, passing_score):
+    """
+    Roll rescored responses up into per-attempt results
+
+    attempt_ids must be sorted and contain every id in response_attempts.
+    Every attempt is graded out of total_marks, the full marks of the quiz
+    under the current key, whichever questions it has response rows for.
+    Returns (scores, totals, percentages, passed).
+    """
+    positions = np.searchsorted(attempt_ids, response_attempts)
+    size = len(attempt_ids)
+
+    attempt_scores = np.bincount(positions, weights=scores, minlength=size).astype(np.int64)
+    totals = np.full(size, total_marks, dtype=np.int64)
+
+    percentages = np.zeros(size, dtype=np.int64)
+    if total_marks > 0:
+        percentages = np.round(attempt_scores / total_marks * 100).astype(np.int64)
+    passed = percentages >= passing_score
+
+    return attempt_scores, totals, percentages, passed
@@ -0,0 +1,55 @@
+import hashlib
+from flask import current_app, request
+
+# Headers rebuilt from the frozen fields, or recomputed on every response
+RECOMPUTED_HEADERS = {'content-type', 'content-length', 'etag'}
+
+RESPONSE_FIELDS = {'body', 'status', 'content_type', 'etag', 'headers'}
+
+
+def freeze_response(response):
+    """
+    Snapshot of a buffered response as plain values: encoded body bytes,
+    status, content type, a strong ETag and the remaining headers
+
+    The ETag is the view's own, or a digest of the body computed once here.
+    Streamed and file responses cannot be frozen and give None.
+    """
+    if response.direct_passthrough or response.is_streamed:
+        return None
+
+    body = response.get_data()
+    etag, _ = response.get_etag()
+
+    return {
+        'body': body,
+        'status': response.status_code,
+        'content_type': response.content_type,
+        'etag': etag or hashlib.sha1(body).hexdigest(),
+        'headers': [(k, v) for k, v in response.headers.items() if k.lower() not in RECOMPUTED_HEADERS]
+    }
+
+
+def is_frozen_response(value):
+    return isinstance(value, dict) and value.keys() == RESPONSE_FIELDS
+
+
+def thaw_response(frozen):
+    """
+    A new response around the frozen body, without re-serializing it
+
+    Answers 304 when the client already holds this representation.
+    """
+    response = current_app.response_class(
+        frozen['body'],
+        status=frozen['status'],
+        headers=frozen['headers'],
+        content_type=frozen['content_type']
+    )
+    response.set_etag(frozen['etag'])
+
+    if request.if_none_match and request.if_none_match.contains_weak(frozen['etag']):
+        response.status_code = 304
+        response.set_data(b'')
+
+    return response
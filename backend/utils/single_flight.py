@@ -0,0 +1,64 @@
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = 'lock:'
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+# Delete the lock only while it still holds our token, so a caller whose
+# lock expired mid-computation cannot release a successor's lock
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def acquire_lock(name, timeout=LOCK_TIMEOUT):
+    """
+    Try to become the one caller recomputing name
+
+    Returns a token to pass to release_lock(), or None while another caller
+    holds the lock. Without Redis there is nothing to coordinate on, so
+    every caller gets a token.
+    """
+    from controllers.extensions import redis_client
+
+    token = uuid.uuid4().hex
+    if redis_client is None:
+        return token
+
+    try:
+        if redis_client.set(f"{LOCK_PREFIX}{name}", token, nx=True, ex=timeout):
+            return token
+        return None
+    except Exception as e:
+        logger.error(f"Error acquiring lock {name}: {str(e)}")
+        return token
+
+
+def release_lock(name, token):
+    from controllers.extensions import redis_client
+
+    if redis_client is None or token is None:
+        return
+
+    try:
+        redis_client.eval(RELEASE_SCRIPT, 1, f"{LOCK_PREFIX}{name}", token)
+    except Exception as e:
+        logger.error(f"Error releasing lock {name}: {str(e)}")
+
+
+def wait_for(load, timeout=LOCK_TIMEOUT):
+    """Poll load() until it returns something other than None, or give up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = load()
+        if value is not None:
+            return value
+    return None
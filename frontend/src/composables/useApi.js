@@ -66,6 +66,20 @@ export function useApi() {
     }
   }
   
+  // GET every page of a keyset-paginated list endpoint
+  const getAll = async (url, config = {}) => {
+    const items = []
+    let after = null
+    do {
+      const params = { ...config.params, limit: 500 }
+      if (after) params.after = after
+      const response = await get(url, { ...config, params })
+      items.push(...response.data)
+      after = response.headers['x-next-cursor']
+    } while (after)
+    return { data: items }
+  }
+  
   // Generic POST request
   const post = async (url, data) => {
     try {
@@ -112,6 +126,7 @@ export function useApi() {
     error,
     isLoading,
     get,
+    getAll,
     post,
     put,
     delete: del